@@ -0,0 +1,307 @@
+"""
+Benchmarks for the storage and analytics hot paths, on synthetic booking tables.
+
+Run from the project folder:
+    python benchmarks/run_benchmarks.py [section ...] [--sizes 10000 100000 1000000] [--fleet 5000]
+
+Sections (all by default):
+    profiles     read/write throughput of each SQLite tuning profile and of SQLite's defaults
+    revenue      monthly revenue report per analytics engine (summary, sql, pandas, chunked)
+    frame        analytics frame build, column-wise from rows against the old per Booking dicts
+    utilization  fleet utilization report over 12 months, NumPy grid against a per day Python loop
+    entities     time and memory to materialise bookings, slotted entities against dict based ones
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gc_rental_app"))
+
+# pylint: disable=wrong-import-position
+import numpy as np
+import pandas as pd
+from configs.app_constants import DB_TUNING_PROFILES, BookingStatus
+from database.schema import SchemaHandler
+from database.sqlite_pool_db_handler import SQLitePoolDBHandler
+from repositories.bookings_repository import BookingsRepository
+from repositories.entities.booking import Booking
+from repositories.vehicle_repository import VehicleRepository
+from services.booking_analytics_service import BookingAnalyticsService
+
+SECTIONS = ("profiles", "revenue", "frame", "utilization", "entities")
+# SQLite's own defaults, what connections ran with before the tuning profiles
+BASELINE_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "mmap_size": 0,
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+}
+# Bookings start anywhere in 2023-2025, the utilization report covers the last of those years
+FIRST_DAY = np.datetime64("2023-01-01")
+SPAN_DAYS = 3 * 365
+REPORT_YEAR = 2025
+
+class _LegacyBooking:
+    """Booking as it was before __slots__: a __dict__ per instance, built through keyword __init__"""
+
+    def __init__(self, user_id, vehicle_id, start_date, end_date, status="pending",
+                 total_cost=None, booking_id=None):
+        self.__id = booking_id
+        self.__user_id = user_id
+        self.__vehicle_id = vehicle_id
+        self.__start_date = start_date
+        self.__end_date = end_date
+        self.__status = status
+        self.__total_cost = total_cost
+
+def _legacy_frame(bookings):
+    """Analytics frame as _build_dataframe made it before the column-wise build"""
+    df = pd.DataFrame([{
+        "id": b.id,
+        "user_id": b.user_id,
+        "vehicle_id": b.vehicle_id,
+        "start_date": b.start_date,
+        "end_date": b.end_date,
+        "total_cost": b.total_cost,
+        "status": b.status
+    } for b in bookings])
+    df = df.set_index("id")
+    df["start_date"] = pd.to_datetime(df["start_date"])
+    df["end_date"] = pd.to_datetime(df["end_date"])
+    df["month"] = df["start_date"].dt.to_period("M")
+    return df
+
+def _loop_idle_days(booking_repo, vehicles, year):
+    """Idle days per (month, vehicle id) counted one booked day at a time, the report without NumPy"""
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    epoch = date(1970, 1, 1).toordinal()
+    days = range(first.toordinal() - epoch, last.toordinal() - epoch + 1)
+    labels = [date.fromordinal(day + epoch).strftime("%Y-%m") for day in days]
+    booked = set()
+    for vehicle_id, start, end in booking_repo.iter_occupancy_intervals(first, last):
+        booked.update((vehicle_id, day) for day in range(max(start, days[0]), min(end, days[-1]) + 1))
+    idle = {}
+    for vehicle in vehicles:
+        for day, label in zip(days, labels):
+            key = (label, vehicle.vehicle_id)
+            idle[key] = idle.get(key, 0) + ((vehicle.vehicle_id, day) not in booked)
+    return idle
+
+def _timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+def _best_of(repeat, func, *args, **kwargs):
+    """Fastest of repeat runs, returns (seconds, result of the last run)"""
+    timings = [_timed(func, *args, **kwargs) for _ in range(repeat)]
+    return min(seconds for seconds, _ in timings), timings[-1][1]
+
+def _traced(func, *args, **kwargs):
+    """Run func under tracemalloc, returns (seconds, peak bytes, result)"""
+    tracemalloc.start()
+    try:
+        seconds, result = _timed(func, *args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+def _open(path: Path, tuning_profile: str = "balanced") -> SQLitePoolDBHandler:
+    # The handler is a singleton, re-initialising it retires the pool of the previous file
+    db = SQLitePoolDBHandler(str(path), tuning_profile=tuning_profile)
+    SchemaHandler.initialise(db)
+    return db
+
+class _Workspace:
+    """Synthetic databases in a temporary folder, each size is generated once and reused"""
+
+    def __init__(self, folder: Path, fleet: int):
+        self.__folder = folder
+        self.__fleet = fleet
+        self.__seeded: dict[int, Path] = {}
+
+    def open(self, bookings: int) -> SQLitePoolDBHandler:
+        if bookings in self.__seeded:
+            return _open(self.__seeded[bookings])
+        path = self.__folder / f"bookings_{bookings}.db"
+        db = _open(path, "bulk-load")
+        print(f"  seeding {bookings:,} bookings over {self.__fleet:,} vehicles ...", flush=True)
+        self.__seed(db, bookings)
+        self.__seeded[bookings] = path
+        return _open(path)
+
+    def __seed(self, db: SQLitePoolDBHandler, bookings: int):
+        rng = np.random.default_rng(bookings)
+        with db.transaction():
+            db.execute(
+                "INSERT INTO user (fullname, username, password, mobile, role) VALUES ('b', 'b', 'x', '1', 2)"
+            )
+            db.execute_many(
+                """
+                INSERT INTO vehicle (plate_number, make, model, year, mileage, daily_rate,
+                                     min_rent_period, max_rent_period)
+                VALUES (?, ?, 'Model', 2020, 1000, 50.0, 1, 30)
+                """,
+                [(f"BENCH{i:06d}", f"Make{i % 20}") for i in range(self.__fleet)]
+            )
+            starts = FIRST_DAY + rng.integers(0, SPAN_DAYS, bookings)
+            ends = starts + rng.integers(0, 7, bookings)
+            statuses = rng.choice([status.value for status in BookingStatus], bookings)
+            # Whole cents, as BookingService charges them
+            costs = np.round(rng.uniform(50, 500, bookings) * 1.1, 2)
+            db.execute_many(
+                """
+                INSERT INTO booking (user_id, vehicle_id, start_date, end_date, status, total_cost)
+                VALUES (1, ?, ?, ?, ?, ?)
+                """,
+                zip(
+                    rng.integers(1, self.__fleet + 1, bookings).tolist(),
+                    starts.astype(str).tolist(),
+                    ends.astype(str).tolist(),
+                    statuses.tolist(),
+                    costs.tolist()
+                )
+            )
+        db.execute("ANALYZE")
+
+def bench_profiles(workspace_folder: Path, operations: int = 2000):
+    """Committed single row inserts and indexed availability probes per profile"""
+    print("\n[profiles] single row writes (one commit each) and indexed reads")
+    print(f"{'profile':<12}{'writes/s':>12}{'reads/s':>12}")
+    rnd = random.Random(1)
+    for profile in ("baseline", *DB_TUNING_PROFILES):
+        path = workspace_folder / f"profile_{profile}.db"
+        if profile == "baseline":
+            db = _open(path, "durable")
+            for pragma, value in BASELINE_PRAGMAS.items():
+                db._connect().execute(f"PRAGMA {pragma} = {value}")
+        else:
+            db = _open(path, profile)
+        db.execute("INSERT INTO user (fullname, username, password, mobile, role) VALUES ('b', 'b', 'x', '1', 2)")
+        db.execute(
+            """
+            INSERT INTO vehicle (plate_number, make, model, year, mileage, daily_rate, min_rent_period, max_rent_period)
+            VALUES ('BENCH', 'Make', 'Model', 2020, 1000, 50.0, 1, 30)
+            """
+        )
+        booking_repo = BookingsRepository(db)
+        days = [date(2025, 1, 1) + timedelta(days=rnd.randrange(365)) for _ in range(operations)]
+
+        write_seconds, _ = _timed(lambda: [
+            booking_repo.add(Booking(1, 1, day, day + timedelta(days=2), "approved", 100.0)) for day in days
+        ])
+        read_seconds, _ = _timed(lambda: [
+            booking_repo.is_vehicle_booked(1, day, day + timedelta(days=3)) for day in days * 5
+        ])
+        print(f"{profile:<12}{operations / write_seconds:>12,.0f}{operations * 5 / read_seconds:>12,.0f}")
+        db.close()
+
+def bench_revenue(workspace: _Workspace, sizes):
+    """Monthly revenue per engine, the pandas engine is timed cold (no cached snapshot)"""
+    print("\n[revenue] monthly revenue report, seconds")
+    engines = ("summary", "sql", "pandas", "chunked")
+    print(f"{'bookings':>10}" + "".join(f"{engine:>10}" for engine in engines))
+    for size in sizes:
+        booking_repo = BookingsRepository(workspace.open(size))
+        timings = []
+        reference = None
+        for engine in engines:
+            seconds, report = _timed(BookingAnalyticsService(booking_repo).get_monthly_revenue, engine)
+            reference = reference or report
+            if report != reference:
+                raise AssertionError(f"{engine} engine report differs from the summary engine")
+            timings.append(seconds)
+        print(f"{size:>10,}" + "".join(f"{seconds:>10.3f}" for seconds in timings))
+
+def bench_frame(workspace: _Workspace, sizes):
+    """Frame build time, peak traced memory and resulting frame size"""
+    print("\n[frame] analytics frame build")
+    print(f"{'bookings':>10}{'build':>10}{'seconds':>10}{'peak MB':>10}{'frame MB':>10}")
+    for size in sizes:
+        booking_repo = BookingsRepository(workspace.open(size))
+        builds = (
+            ("dicts", lambda: _legacy_frame(booking_repo.get_all())),
+            ("columns", lambda: BookingAnalyticsService._frame_from_rows(booking_repo.iter_booking_rows())),
+        )
+        for name, build in builds:
+            seconds, _ = _timed(build)
+            # Traced separately so tracing overhead does not distort the timing
+            _, peak, frame = _traced(build)
+            frame_mb = frame.memory_usage(deep=True).sum() / 2**20
+            print(f"{size:>10,}{name:>10}{seconds:>10.2f}{peak / 2**20:>10.1f}{frame_mb:>10.1f}")
+
+def bench_utilization(workspace: _Workspace, size: int):
+    """Fleet utilization over the last 12 months of the synthetic period, checked against the loop"""
+    print("\n[utilization] 12 month fleet utilization report")
+    db = workspace.open(size)
+    vehicles = VehicleRepository(db).get_all()
+    booking_repo = BookingsRepository(db)
+    analytics = BookingAnalyticsService(booking_repo)
+    seconds, (vehicle_rows, make_rows) = _timed(
+        analytics.get_utilization_report, vehicles, date(REPORT_YEAR, 1, 1), date(REPORT_YEAR, 12, 1)
+    )
+    loop_seconds, idle = _timed(_loop_idle_days, booking_repo, vehicles, REPORT_YEAR)
+    if {(row[0], row[1]): row[5] for row in vehicle_rows} != idle:
+        raise AssertionError("utilization report idle days differ from the per day loop")
+    print(f"{len(vehicles):,} vehicles, {size:,} bookings: {seconds:.2f}s, per day loop {loop_seconds:.2f}s "
+          f"({len(vehicle_rows):,} vehicle rows, {len(make_rows):,} make rows)")
+
+def bench_entities(workspace: _Workspace, sizes):
+    """Materialising every booking, per object memory is extrapolated to 1M bookings"""
+    print("\n[entities] materialise all bookings")
+    print(f"{'bookings':>10}{'entity':>10}{'seconds':>10}{'MB per 1M':>12}")
+    for size in sizes:
+        db = workspace.open(size)
+        rows = db.execute_and_fetch_all("SELECT * FROM booking")
+        builds = (
+            ("dict", lambda: [
+                _LegacyBooking(
+                    user_id=row["user_id"], vehicle_id=row["vehicle_id"],
+                    start_date=row["start_date"], end_date=row["end_date"],
+                    status=row["status"], total_cost=row["total_cost"], booking_id=row["id"]
+                ) for row in rows
+            ]),
+            ("slotted", lambda: [Booking.from_row(row) for row in rows]),
+        )
+        for name, build in builds:
+            seconds, _ = _best_of(3, build)
+            _, peak, _ = _traced(build)
+            print(f"{size:>10,}{name:>10}{seconds:>10.2f}{peak / size * 1_000_000 / 2**20:>12.0f}")
+        del rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sections", nargs="*", help=f"sections to run, all by default: {', '.join(SECTIONS)}")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000],
+                        help="booking table sizes, utilization runs on the largest one only")
+    parser.add_argument("--fleet", type=int, default=5000, help="number of vehicles in the synthetic fleet")
+    args = parser.parse_args()
+    sections = args.sections or SECTIONS
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="gc_rental_bench_") as folder:
+        workspace = _Workspace(Path(folder), args.fleet)
+        if "profiles" in sections:
+            bench_profiles(Path(folder))
+        if "revenue" in sections:
+            bench_revenue(workspace, args.sizes)
+        if "frame" in sections:
+            bench_frame(workspace, args.sizes)
+        if "utilization" in sections:
+            bench_utilization(workspace, max(args.sizes))
+        if "entities" in sections:
+            bench_entities(workspace, args.sizes)
+        SQLitePoolDBHandler._instance.close()
+
+if __name__ == "__main__":
+    main()
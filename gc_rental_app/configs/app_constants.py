@@ -1,5 +1,6 @@
 """This file contains constants used use for the app"""
 
+import os
 from enum import Enum
 
 # Application
@@ -8,6 +9,43 @@ APP_VERSION = "1.0.0"
 
 # Database
 DB_FILE_NAME = "gc_rental.db"
+DB_POOL_SIZE = 5
+DB_POOL_CHECKOUT_TIMEOUT = 5.0
+DB_STREAM_BATCH_SIZE = 1000
+# Ids bound per IN (...) query by batch lookups, stays below SQLite's host parameter limit
+DB_IN_BATCH_SIZE = 500
+
+# SQLite storage tuning profiles, pick one with GC_RENTAL_DB_PROFILE env variable
+DB_TUNING_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 128 * 1024 * 1024,
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -128000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+DB_TUNING_PROFILE = os.environ.get("GC_RENTAL_DB_PROFILE", "balanced")
+
+# Rows updated per transaction by migration backfills
+MIGRATION_BATCH_SIZE = 5000
 
 # Input Rules
 MIN_USERNAME_LENGTH = 3
@@ -16,6 +54,27 @@ MIN_PASSWORD_LENGTH = 4
 PASSWORD_POLICY_STRING = f"Minimum length of the password is {MIN_PASSWORD_LENGTH}"
 
 ANALYTICS_DEMAND_PERIOD = 7
+# Engine used for aggregate reports: "summary" (trigger maintained tables),
+# "sql" (pushed down to sqlite), "pandas" or "chunked" (pandas over bounded chunks)
+ANALYTICS_ENGINE = "summary"
+# Rows per frame when reports run in "chunked" mode
+ANALYTICS_CHUNK_SIZE = 50000
+# Worker processes used by the parallel report executor
+ANALYTICS_WORKERS = os.cpu_count() or 1
+# How parallel reports split the booking table: "year" (by start date) or "vehicle" (by vehicle id range)
+ANALYTICS_PARTITION_BY = "year"
+
+# Engine used to search available vehicles: "index" (in memory interval index) or "sql"
+AVAILABILITY_ENGINE = "index"
+
+# Default number of days shown in the availability calendar
+CALENDAR_DAYS = 30
+
+# Rows shown per page in admin listings
+PAGE_SIZE = 20
+
+# Vehicles kept in the VehicleRepository identity map, 0 disables it
+VEHICLE_CACHE_SIZE = 256
 
 class UserRole(Enum):
     """Define the enum for the user roles"""
@@ -1,9 +1,11 @@
 """Admin CUI"""
 
 import logging
-from cui.cui_helper import get_valid_input, print_table, draw_box, clear_screen
+from datetime import date, datetime
+from cui.cui_helper import get_valid_input, print_table, draw_box, clear_screen, browse_pages, print_calendar, get_date_input
 from repositories.entities.vehicle import Vehicle
 import configs.strings
+from configs.app_constants import PAGE_SIZE, CALENDAR_DAYS, BookingStatus
 from services.vehicle_service import VehicleService
 from services.bookings_service import BookingService
 import utils.exceptions as exceptions
@@ -34,14 +36,23 @@ class AdminCUI(CUI):
                 "1. View All Bookings", 
                 "2. Manage Pending Bookings",
                 "3. Complete Booking",
-                "4. Go Back",
+                "4. Fleet Calendar",
+                "5. Go Back",
             ]
     
     __report_menu = [
             "1. Revenue Report",
-            "2. Go Back"
+            "2. Recompute Revenue Report",
+            "3. Fleet Utilization Report",
+            "4. Rebuild Revenue Summary",
+            "5. Go Back"
         ]
 
+    # Booking detail fields shown by the approve/reject and complete booking screens
+    __booking_action_columns = (
+        "username", "plate_number", "make", "model", "start_date", "end_date", "total_cost"
+    )
+
     def __init__(
             self,
             session: Session,
@@ -112,11 +123,17 @@ class AdminCUI(CUI):
             choose = get_valid_input(
                 prompt="Choose : ",
                 cast_func=int,
-                validator= lambda x: 1<=x<=len(self.__cars_menu)
+                validator= lambda x: 1<=x<=len(self.__report_menu)
             )
             if choose == 1:
                 self.__show_monthly_revenue()
             elif choose == 2:
+                self.__show_recompute_monthly_revenue()
+            elif choose == 3:
+                self.__show_utilization_report()
+            elif choose == 4:
+                self.__show_rebuild_revenue_summary()
+            elif choose == 5:
                 break
 
     def __show_monthly_revenue(self):
@@ -138,6 +155,92 @@ class AdminCUI(CUI):
         finally:
             input("Press Enter to continue...")
     
+    def __show_recompute_monthly_revenue(self):
+        "Recompute the revenue report from all bookings in background worker processes"
+        clear_screen()
+        draw_box("Recompute Revenue Report")
+        print("Press Ctrl+C to cancel")
+        try:
+            headers = ["Month", "Revenue ($)"]
+            rows = self.__booking_service.recompute_monthly_revenue(
+                self.__session.current_user,
+                on_progress=lambda done, total: print(f"\rPartitions done: {done}/{total}", end="", flush=True)
+            )
+            print()
+            print_table(headers, rows)
+        except KeyboardInterrupt:
+            print("\nReport cancelled")
+        except PermissionError:
+            print("User not authorized")
+        except ValueError as e:
+            print(e)
+        except Exception as e:
+            logging.exception("Unexpected error occurred!!! error = %s", e)
+            print("Revenue report failed! Please try again later")
+        finally:
+            input("Press Enter to continue...")
+
+    def __show_utilization_report(self):
+        "Show fleet occupancy per make and optionally per vehicle"
+        clear_screen()
+        draw_box("Fleet Utilization Report")
+        try:
+            this_month = date.today().replace(day=1)
+            first_month = self.__get_month_input("From month (YYYY-MM): ", this_month)
+            last_month = self.__get_month_input("To month (YYYY-MM): ", first_month)
+            vehicle_rows, make_rows = self.__booking_service.get_utilization_report(
+                self.__session.current_user, first_month, last_month
+            )
+            if not make_rows:
+                print("No vehicles found")
+                return
+            print_table(["Month", "Make", "Vehicles", "Occupancy (%)", "Idle Days", "Avg Days"], make_rows)
+
+            print()
+            show_vehicles = get_valid_input(
+                "Show per vehicle breakdown? (y/n): ",
+                validator= lambda x: x in ("y", "n","Y", "N")
+            )
+            if show_vehicles.lower() == "y":
+                print_table(
+                    ["Month", "ID", "Plate", "Make", "Occupancy (%)", "Idle Days", "Avg Days"],
+                    vehicle_rows
+                )
+        except PermissionError:
+            print("User not authorized")
+        except ValueError as e:
+            print(e)
+        except Exception as e:
+            logging.exception("Unexpected error occurred!!! error = %s", e)
+            print("Utilization report failed! Please try again later")
+        finally:
+            input("Press Enter to continue...")
+
+    @staticmethod
+    def __get_month_input(prompt: str, default: date) -> date:
+        """Read a YYYY-MM month, returns the first day of that month"""
+        month = get_valid_input(
+            prompt,
+            cast_func=lambda x: datetime.strptime(x, "%Y-%m").strftime("%Y-%m"),
+            default=default.strftime("%Y-%m")
+        )
+        return datetime.strptime(month, "%Y-%m").date()
+
+    def __show_rebuild_revenue_summary(self):
+        "Recompute the revenue summary table"
+        clear_screen()
+        draw_box("Rebuild Revenue Summary")
+        try:
+            self.__booking_service.rebuild_revenue_summary(self.__session.current_user)
+            print("Revenue summary rebuilt successfully")
+        except PermissionError:
+            print("User not authorized")
+        except Exception as e:
+            logging.exception("Unexpected error occurred!!! error = %s", e)
+            print("Rebuild revenue summary failed! Please try again later")
+        finally:
+            input("Press Enter to continue...")
+
     def __show_add_car(self):
         "Adding Cars to the inventory"
         clear_screen()
@@ -211,17 +314,21 @@ class AdminCUI(CUI):
         clear_screen()
         draw_box("View All Vehicles")
         try:
-            vehicles = self.__vehicle_service.view_vehicles(self.__session.current_user)
-            if vehicles is None or len(vehicles) == 0:
-                print("No vehicles found!")
             headers = [
                 "ID", "Plate", "Brand", "Model",
                 "Year", "Mileage", "Rate($)",
                 "Max Period", "Min Period"
             ]
 
-            rows = [
-                [
+            def fetch_page(after, before):
+                return self.__vehicle_service.view_vehicles_page(
+                    self.__session.current_user,
+                    after_id=after.vehicle_id if after else None,
+                    before_id=before.vehicle_id if before else None
+                )
+
+            def to_row(v):
+                return [
                     v.vehicle_id,
                     v.plate_number,
                     v.make,
@@ -232,14 +339,13 @@ class AdminCUI(CUI):
                     v.max_rent_period,
                     v.min_rent_period
                 ]
-                for v in vehicles
-            ]
 
-            print_table(headers, rows)
+            if not browse_pages("View All Vehicles", headers, fetch_page, to_row, PAGE_SIZE):
+                print("No vehicles found!")
+                input("Press Enter to continue...")
         except Exception as e:
             logging.exception("Unexpected error occurred!!! error = %s", e)
             print("Remove vehicle failed! Please try again later!")
-        finally:
             input("Press Enter to continue...")
 
     def __collect_vehicle_input(self, existing_vehicle=None):
@@ -328,6 +434,8 @@ class AdminCUI(CUI):
             elif choose == 3:
                 self.__show_complete_booking()
             elif choose == 4:
+                self.__show_fleet_calendar()
+            elif choose == 5:
                 break
 
     def __show_all_bookings(self):
@@ -336,42 +444,46 @@ class AdminCUI(CUI):
         clear_screen()
         draw_box("View All Bookings")
         try:
-            bookings = self.__booking_service.get_all_bookings(self.__session.current_user)
-            if not bookings:
-                print("No bookings found.")
-                return
-
             headers = [
                 "Booking ID",
-                "User ID",
-                "Vehicle ID",
+                "User",
+                "Vehicle",
                 "Start Date",
                 "End Date",
                 "Status",
                 "Total Cost"
             ]
 
-            rows = [
-                [
+            def fetch_page(after, before):
+                return self.__booking_service.get_booking_details(
+                    self.__session.current_user,
+                    columns=("username", "plate_number", "start_date", "end_date", "status", "total_cost"),
+                    after_id=after.id if after else None,
+                    before_id=before.id if before else None,
+                    page_size=PAGE_SIZE
+                )
+
+            def to_row(b):
+                return [
                     b.id,
-                    b.user_id,
-                    b.vehicle_id,
+                    b.username or "-",
+                    b.plate_number or "-",
                     b.start_date,
                     b.end_date,
                     b.status,
                     f"${b.total_cost:.2f}" if b.total_cost else "-"
                 ]
-                for b in bookings
-            ]
 
-            print_table(headers, rows)
+            if not browse_pages("View All Bookings", headers, fetch_page, to_row, PAGE_SIZE):
+                print("No bookings found.")
+                input("Press Enter to continue...")
 
         except PermissionError:
             print("You are not authorized to view all bookings.")
+            input("Press Enter to continue...")
         except Exception as e:
             logging.exception("Unexpected error occurred!!! error = %s", e)
             print("Failed to load bookings. Please try again later!")
-        finally:
             input("Press Enter to continue...")
 
     def __show_manage_pending_bookings(self):
@@ -380,7 +492,11 @@ class AdminCUI(CUI):
         draw_box("View And Manage Pending Bookings")
         try:
             # Get pending bookings
-            pending_bookings = self.__booking_service.get_pending_bookings(self.__session.current_user)
+            pending_bookings = self.__booking_service.get_booking_details(
+                self.__session.current_user,
+                columns=self.__booking_action_columns,
+                status=BookingStatus.PENDING
+            )
 
             if not pending_bookings:
                 print("No pending bookings.")
@@ -389,8 +505,9 @@ class AdminCUI(CUI):
             # Display pending bookings
             headers = [
                 "Booking ID",
-                "User ID",
-                "Vehicle ID",
+                "User",
+                "Vehicle",
+                "Car",
                 "Start Date",
                 "End Date",
                 "Total Cost"
@@ -399,8 +516,9 @@ class AdminCUI(CUI):
             rows = [
                 [
                     b.id,
-                    b.user_id,
-                    b.vehicle_id,
+                    b.username or "-",
+                    b.plate_number or "-",
+                    f"{b.make} {b.model}" if b.plate_number else "-",
                     b.start_date,
                     b.end_date,
                     f"${b.total_cost:.2f}" if b.total_cost else "-"
@@ -456,6 +574,34 @@ class AdminCUI(CUI):
         finally:
             input("Press Enter to continue...")
 
+    def __show_fleet_calendar(self):
+        """Show the occupancy of every vehicle over a period"""
+
+        clear_screen()
+        draw_box("Fleet Calendar")
+        try:
+            start_date = get_date_input("Start date (YYYY-MM-DD): ")
+            days = get_valid_input(
+                prompt="Number of days: ",
+                cast_func=int,
+                validator=lambda x: 1 <= x <= 366,
+                default=CALENDAR_DAYS
+            )
+            calendar = self.__booking_service.get_availability_calendar(start_date, days)
+            if not calendar.vehicles:
+                print("No vehicles found!")
+                return
+
+            print_calendar(calendar)
+            booked = calendar.occupancy.sum()
+            total = calendar.occupancy.size
+            print(f"Fleet occupancy for the period: {booked / total:.0%}")
+        except Exception as e:
+            logging.exception("Unexpected error occurred!!! error = %s", e)
+            print("Failed to load the fleet calendar. Please try again later!")
+        finally:
+            input("Press Enter to continue...")
+
     def __show_complete_booking(self):
         """Complete the booking once Vehicle is returned"""
 
@@ -463,7 +609,11 @@ class AdminCUI(CUI):
         draw_box("Complete Booking")
         try:
             # Step 1: Get approved bookings with user details
-            bookings = self.__booking_service.get_approved_bookings(self.__session.current_user)
+            bookings = self.__booking_service.get_booking_details(
+                self.__session.current_user,
+                columns=self.__booking_action_columns,
+                status=BookingStatus.APPROVED
+            )
 
             if not bookings:
                 print("No approved bookings available to complete.")
@@ -472,8 +622,9 @@ class AdminCUI(CUI):
             # Step 2: Display bookings
             headers = [
                 "Booking ID",
-                "User ID",
-                "Vehicle ID",
+                "User",
+                "Vehicle",
+                "Car",
                 "Start Date",
                 "End Date",
                 "Total Cost"
@@ -482,8 +633,9 @@ class AdminCUI(CUI):
             rows = [
                 [
                     b.id,
-                    b.user_id,
-                    b.vehicle_id,
+                    b.username or "-",
+                    b.plate_number or "-",
+                    f"{b.make} {b.model}" if b.plate_number else "-",
                     b.start_date,
                     b.end_date,
                     f"${b.total_cost:.2f}"
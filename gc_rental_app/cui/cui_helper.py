@@ -99,6 +99,74 @@ def print_table(headers, rows, max_width=20):
         )
     print("-" * len(header_line))
 
+def browse_pages(title, headers, fetch_page, to_row, page_size):
+    """
+    Show a keyset paginated table with next/previous navigation.
+    fetch_page(after, before) returns the page after/before the given item (both None for the first page)
+    to_row converts an item into a table row
+    Returns False when there was nothing to show
+    """
+    page = fetch_page(None, None)
+    if not page:
+        return False
+
+    page_number = 1
+    while True:
+        clear_screen()
+        draw_box(title)
+        print_table(headers, [to_row(item) for item in page])
+        print(f"Page {page_number}")
+
+        has_next = len(page) == page_size
+        has_previous = page_number > 1
+        options = []
+        if has_next:
+            options.append("n")
+        if has_previous:
+            options.append("p")
+        options.append("q")
+        labels = {"n": "(n)ext", "p": "(p)revious", "q": "(q)uit"}
+
+        choice = get_valid_input(
+            prompt=", ".join(labels[o] for o in options) + ": ",
+            validator=lambda x, allowed=options: x.lower() in allowed
+        ).lower()
+
+        if choice == "q":
+            return True
+        if choice == "n":
+            next_page = fetch_page(page[-1], None)
+            if not next_page:
+                input("No more records. Press Enter to continue...")
+                continue
+            page = next_page
+            page_number += 1
+        elif choice == "p":
+            page = fetch_page(None, page[0])
+            page_number -= 1
+
+def print_calendar(calendar, label_width=12):
+    """
+    Render an availability calendar, one line per vehicle.
+    '#' marks a booked day and '.' a free one, the header shows the day of month.
+    """
+    days = calendar.days
+    if not calendar.vehicles or not days:
+        return
+
+    tens = "".join(str(d.day // 10) if d.day >= 10 else " " for d in days)
+    units = "".join(str(d.day % 10) for d in days)
+    print(f"{'':<{label_width}} {days[0]:%b %Y}")
+    print(f"{'':<{label_width}} {tens}")
+    print(f"{'Plate':<{label_width}} {units}")
+    print("-" * (label_width + 1 + len(days)))
+
+    for vehicle, booked in zip(calendar.vehicles, calendar.occupancy):
+        cells = "".join("#" if is_booked else "." for is_booked in booked)
+        print(f"{vehicle.plate_number[:label_width]:<{label_width}} {cells}")
+    print()
+    print("# booked, . free")
+
 def draw_box(title, width=40):
     """Draw a box with a title"""
     print("\n")
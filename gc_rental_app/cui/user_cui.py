@@ -1,12 +1,14 @@
 """User CUI"""
 
 import logging
+from datetime import timedelta
 import configs.strings
 from repositories.entities.booking import Booking
 from services.vehicle_service import VehicleService
 from services.bookings_service import BookingService
 from utils.exceptions import VehicleAlreadyBooked
-from .cui_helper import get_valid_input, clear_screen, draw_box, get_date_input, print_table
+from configs.app_constants import CALENDAR_DAYS
+from .cui_helper import get_valid_input, clear_screen, draw_box, get_date_input, print_table, print_calendar
 from .session import Session
 from .cui import CUI
 
@@ -17,8 +19,10 @@ class UserCUI(CUI):
 
     __menu = [
                 "1. Book a Car",
-                "2. View My Bookings",
-                "3. Logout",
+                "2. Flexible Date Search",
+                "3. View My Bookings",
+                "4. Availability Calendar",
+                "5. Logout",
             ]
     
     def __init__(
@@ -49,8 +53,12 @@ class UserCUI(CUI):
             if choose == 1:
                 self.__show_book_car()
             elif choose == 2:
-                self.__view_my_bookings()
+                self.__show_flexible_search()
             elif choose == 3:
+                self.__view_my_bookings()
+            elif choose == 4:
+                self.__show_availability_calendar()
+            elif choose == 5:
                 self.__session.logout()
                 break
 
@@ -70,14 +78,13 @@ class UserCUI(CUI):
             input("Press Enter to continue...")
             return
 
-        requested_days = (end_date - start_date).days + 1
-
         try:
             vehicles = self.__booking_service.list_available_vehicles(start_date, end_date)
             if not vehicles:
                 print("\nNo vehicles available for the selected period.")
             else:
-                headers = ["ID", "Plate", "Make", "Model", "Year", "Rate($/day)", "Min Days", "Max Days"]
+                prices = self.__booking_service.quote_prices(vehicles, start_date, end_date)
+                headers = ["ID", "Plate", "Make", "Model", "Year", "Rate($/day)", "Min Days", "Max Days", "Price($)"]
                 rows = [
                     [
                         v.vehicle_id,
@@ -87,9 +94,10 @@ class UserCUI(CUI):
                         v.year,
                         v.daily_rate,
                         v.min_rent_period,
-                        v.max_rent_period
+                        v.max_rent_period,
+                        f"{price:.2f}"
                     ]
-                    for v in vehicles
+                    for v, price in zip(vehicles, prices)
                 ]
                 print_table(headers, rows)
 
@@ -112,31 +120,7 @@ class UserCUI(CUI):
                     input("Press Enter to continue...")
                     return
                 
-                # Confirm booking period
-                print(f"You selected: {selected_vehicle.make} {selected_vehicle.model}")
-                print(f"Booking period: {start_date} to {end_date} ({requested_days} days)")
-                total_cost = self.__booking_service.calculate_price(selected_vehicle, start_date, end_date)
-                print(f"Total cost: ${total_cost:.2f}\n")
-
-                confirm = get_valid_input(
-                    "Confirm this booking? (y/n): ",
-                    validator= lambda x: x in ("y", "Y", "n", "N")
-                )
-                if confirm.lower() != "y":
-                    print("Booking cancelled.")
-                    return
-                
-                # Create booking
-                booking = Booking(
-                    user_id=self.__session.current_user.user_id,
-                    vehicle_id=selected_vehicle.vehicle_id,
-                    start_date=start_date,
-                    end_date=end_date,
-                    status="pending",
-                    total_cost=total_cost
-                )
-                self.__booking_service.add_booking(self.__session.current_user, booking)
-                print(f"Booking successful! Your Booking Reference is: {booking.id}")
+                self.__confirm_and_book(selected_vehicle, start_date, end_date)
         except VehicleAlreadyBooked:
             print("Failed to complete the booking. Vehicle already booked!!. Please try again later!")
         except Exception as e:
@@ -145,6 +129,127 @@ class UserCUI(CUI):
         finally:
             input("Press Enter to continue...")
 
+    def __show_availability_calendar(self):
+        """Show which cars are free on each day of the coming period"""
+
+        clear_screen()
+        draw_box("Availability Calendar")
+        try:
+            start_date = get_date_input("Start date (YYYY-MM-DD): ")
+            days = get_valid_input(
+                prompt="Number of days: ",
+                cast_func=int,
+                validator=lambda x: 1 <= x <= 366,
+                default=CALENDAR_DAYS
+            )
+            calendar = self.__booking_service.get_availability_calendar(start_date, days)
+            if not calendar.vehicles:
+                print("No vehicles found!")
+                return
+            print_calendar(calendar)
+        except Exception as e:
+            logging.exception("Unexpected error occurred!!! error = %s", e)
+            print("Failed to load the availability calendar. Please try again later!")
+        finally:
+            input("Press Enter to continue...")
+
+    def __confirm_and_book(self, selected_vehicle, start_date, end_date):
+        """Show the price of the selected vehicle and period and create the booking once confirmed"""
+        requested_days = (end_date - start_date).days + 1
+
+        # Confirm booking period
+        print(f"You selected: {selected_vehicle.make} {selected_vehicle.model}")
+        print(f"Booking period: {start_date} to {end_date} ({requested_days} days)")
+        total_cost = self.__booking_service.calculate_price(selected_vehicle, start_date, end_date)
+        print(f"Total cost: ${total_cost:.2f}\n")
+
+        confirm = get_valid_input(
+            "Confirm this booking? (y/n): ",
+            validator= lambda x: x in ("y", "Y", "n", "N")
+        )
+        if confirm.lower() != "y":
+            print("Booking cancelled.")
+            return
+
+        # Create booking
+        booking = Booking(
+            user_id=self.__session.current_user.user_id,
+            vehicle_id=selected_vehicle.vehicle_id,
+            start_date=start_date,
+            end_date=end_date,
+            status="pending",
+            total_cost=total_cost
+        )
+        self.__booking_service.add_booking(self.__session.current_user, booking)
+        print(f"Booking successful! Your Booking Reference is: {booking.id}")
+
+    def __show_flexible_search(self):
+        """Find the earliest free slot of each car for a rental length within a date window"""
+
+        clear_screen()
+        draw_box("Flexible Date Search")
+        try:
+            days = get_valid_input(
+                prompt="Number of rental days: ",
+                cast_func=int,
+                validator=lambda x: x > 0
+            )
+            print("Enter the window the rental should fall in:")
+            window_start = get_date_input("From (YYYY-MM-DD): ")
+            window_end = get_date_input("To (YYYY-MM-DD): ")
+            flexibility = get_valid_input(
+                prompt="Flexibility (+/- days): ",
+                cast_func=int,
+                validator=lambda x: x >= 0,
+                default=0
+            )
+
+            slots = self.__booking_service.find_earliest_slots(days, window_start, window_end, flexibility)
+            if not slots:
+                print("\nNo vehicles have a free slot in the selected window.")
+                return
+
+            headers = ["ID", "Plate", "Make", "Model", "Rate($/day)", "Start Date", "End Date"]
+            rows = [
+                [
+                    v.vehicle_id,
+                    v.plate_number,
+                    v.make,
+                    v.model,
+                    v.daily_rate,
+                    slot_start,
+                    slot_start + timedelta(days=days - 1)
+                ]
+                for v, slot_start in slots
+            ]
+            print_table(headers, rows)
+            print()
+
+            cont = get_valid_input(
+                "Do you want to book one of these? (y/n): ",
+                validator= lambda x: x in ("y", "n","Y", "N")
+            )
+            if cont.lower() != "y":
+                return
+
+            vehicle_id = get_valid_input("Enter Vehicle ID to book: ", int)
+            selected = next(((v, start) for v, start in slots if v.vehicle_id == vehicle_id), None)
+            if not selected:
+                print("Invalid vehicle ID selected.")
+                return
+
+            selected_vehicle, slot_start = selected
+            self.__confirm_and_book(selected_vehicle, slot_start, slot_start + timedelta(days=days - 1))
+        except ValueError as e:
+            print(e)
+        except VehicleAlreadyBooked:
+            print("Failed to complete the booking. Vehicle already booked!!. Please try again later!")
+        except Exception as e:
+            logging.exception("Unexpected error occurred!!! error = %s", e)
+            print("Failed to search vehicles. Please try again later!")
+        finally:
+            input("Press Enter to continue...")
+
     def __view_my_bookings(self):
         """Return all bookings for the logged-in user"""
 
@@ -159,17 +264,18 @@ class UserCUI(CUI):
 
             headers = [
                 "Booking ID",
-                "Vehicle ID",
+                "Vehicle",
                 "Start Date",
                 "End Date",
                 "Status",
                 "Total Cost"
             ]
+            vehicles = self.__booking_service.get_booking_vehicles(bookings)
 
             rows = [
                 [
                     b.id,
-                    b.vehicle_id,
+                    vehicles[b.vehicle_id].plate_number if b.vehicle_id in vehicles else "-",
                     b.start_date,
                     b.end_date,
                     b.status,
@@ -31,3 +31,15 @@ class DatabaseHandler(ABC):
     @abstractmethod
     def execute_and_fetch_all(self, sql, params=()):
         """Abstract Method: Execute sql statement and returns all records found"""
+
+    @abstractmethod
+    def execute_and_stream(self, sql, params=(), batch_size=None):
+        """Abstract Method: Execute sql statement and yield the records in batches"""
+
+    @abstractmethod
+    def transaction(self):
+        """Abstract Method: Context manager grouping statements into one atomic commit"""
+
+    @abstractmethod
+    def after_transaction(self, callback):
+        """Abstract Method: Run callback once the current transaction commits, or right away outside one"""
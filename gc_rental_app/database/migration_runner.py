@@ -0,0 +1,100 @@
+"""Versioned schema migrations keyed on PRAGMA user_version"""
+
+import importlib
+import logging
+import pkgutil
+from types import ModuleType
+from configs.app_constants import MIGRATION_BATCH_SIZE
+from .database_handler import DatabaseHandler
+from . import migrations
+
+logger = logging.getLogger(__name__)
+
+class MigrationRunner:
+    """
+    Applies the migration modules found in the database.migrations package in VERSION order.
+    Each module defines VERSION and upgrade(db). Migrations run inside a single transaction
+    together with the user_version bump unless they set TRANSACTIONAL = False, in which case
+    they manage their own (batched) transactions and must be safe to re-run.
+    """
+
+    def __init__(self, db: DatabaseHandler, package: ModuleType = migrations):
+        self.__db = db
+        self.__migrations = self.__discover(package)
+
+    @property
+    def latest_version(self) -> int:
+        """Schema version reached once every migration is applied"""
+        return self.__migrations[-1].VERSION if self.__migrations else 0
+
+    def current_version(self) -> int:
+        """Schema version stored in the database file"""
+        return self.__db.execute_and_fetch_one("PRAGMA user_version")
+
+    def run(self) -> int:
+        """Apply pending migrations and return the resulting schema version"""
+        current = self.current_version()
+        pending = [m for m in self.__migrations if m.VERSION > current]
+        if not pending:
+            logger.debug("Database schema is up to date at version %s", current)
+            return current
+
+        for migration in pending:
+            logger.info("Applying migration %s (%s)", migration.VERSION, migration.__name__)
+            if getattr(migration, "TRANSACTIONAL", True):
+                with self.__db.transaction():
+                    migration.upgrade(self.__db)
+                    self.__set_version(migration.VERSION)
+            else:
+                migration.upgrade(self.__db)
+                self.__set_version(migration.VERSION)
+            current = migration.VERSION
+
+        return current
+
+    def __set_version(self, version: int):
+        # PRAGMA does not accept bound parameters, version always comes from module code
+        self.__db.execute(f"PRAGMA user_version = {int(version)}")
+
+    @staticmethod
+    def __discover(package: ModuleType) -> list[ModuleType]:
+        """Import every migration module in the package, ordered by VERSION"""
+        modules = [
+            importlib.import_module(f"{package.__name__}.{info.name}")
+            for info in pkgutil.iter_modules(package.__path__)
+        ]
+        modules.sort(key=lambda module: module.VERSION)
+
+        versions = [module.VERSION for module in modules]
+        if len(versions) != len(set(versions)):
+            raise ValueError(f"Duplicate migration versions found: {versions}")
+        return modules
+
+def create_index_in_own_transaction(db: DatabaseHandler, sql: str):
+    """
+    Build one index per transaction, committed before the next one starts.
+    SQLite holds the write lock for the whole CREATE INDEX, so this is not an online build:
+    writers still wait for each index, but not for every index of the migration at once.
+    """
+    with db.transaction():
+        db.execute(sql)
+
+def backfill_in_batches(
+        db: DatabaseHandler,
+        table: str,
+        sql: str,
+        batch_size: int = MIGRATION_BATCH_SIZE
+    ) -> int:
+    """
+    Run an UPDATE over the table in id ranges, committing after each batch.
+    The statement must take the range as two parameters: "... WHERE id BETWEEN ? AND ?".
+    Returns the number of rows touched.
+    """
+    max_id = db.execute_and_fetch_one(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    touched = 0
+    for low in range(1, max_id + 1, batch_size):
+        with db.transaction():
+            cursor = db.execute(sql, (low, low + batch_size - 1))
+            touched += cursor.rowcount
+    logger.info("Backfilled %s rows in %s", touched, table)
+    return touched
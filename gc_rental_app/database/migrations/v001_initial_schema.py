@@ -0,0 +1,63 @@
+"""Migration 1: user, vehicle and booking tables plus the default super admin"""
+
+from database.database_handler import DatabaseHandler
+from configs.app_constants import UserRole
+
+VERSION = 1
+
+USER_TABLE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fullname VARCHAR(255) NOT NULL,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        mobile VARCHAR(15),
+        role INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+VEHICLE_TABLE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS vehicle (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plate_number VARCHAR(20) UNIQUE NOT NULL,
+        make VARCHAR(50) NOT NULL,
+        model VARCHAR(50) NOT NULL,
+        year INTEGER NOT NULL,
+        mileage INTEGER,
+        daily_rate DECIMAL(10, 2) NOT NULL,
+        min_rent_period INTEGER NOT NULL,
+        max_rent_period INTEGER NOT NULL
+    )
+"""
+
+BOOKING_TABLE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS booking (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        vehicle_id INTEGER,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        status VARCHAR(50) DEFAULT 'pending' CHECK(status IN ('pending', 'approved', 'rejected', 'completed')),
+        total_cost DECIMAL(10, 2),
+        FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE SET NULL,
+        FOREIGN KEY (vehicle_id) REFERENCES vehicle(id) ON DELETE SET NULL
+    )
+"""
+
+def upgrade(db: DatabaseHandler):
+    """Create tables and seed the super admin account"""
+    db.execute(USER_TABLE_SCHEMA)
+    db.execute(VEHICLE_TABLE_SCHEMA)
+    db.execute(BOOKING_TABLE_SCHEMA)
+
+    exists = db.execute_and_fetch_one(
+        "SELECT COUNT(*) FROM user WHERE role = ?",
+        (UserRole.SUPER_ADMIN.value,)
+    )
+
+    if not exists:
+        db.execute(
+            "INSERT INTO user (fullname, username, password, role) VALUES (?, ?, ?, ?)",
+            ("superadmin", "superadmin", "$2b$12$RDUIHEl327lBsoWJbLaLE.bi.FulZ3Z7wrv8F4FVbnlxHVd5uhoU2", UserRole.SUPER_ADMIN.value)
+        )
@@ -0,0 +1,30 @@
+"""Migration 2: indexes backing the booking lookups in BookingsRepository"""
+
+from database.database_handler import DatabaseHandler
+from database.migration_runner import create_index_in_own_transaction
+
+VERSION = 2
+
+# Each index is built and committed on its own so the write lock is released in between
+TRANSACTIONAL = False
+
+BOOKING_INDEXES = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_booking_vehicle_status_dates
+    ON booking (vehicle_id, status, start_date, end_date)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_booking_user_start
+    ON booking (user_id, start_date)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_booking_status
+    ON booking (status)
+    """,
+]
+
+def upgrade(db: DatabaseHandler):
+    """Create the booking indexes and refresh planner statistics"""
+    for sql in BOOKING_INDEXES:
+        create_index_in_own_transaction(db, sql)
+    db.execute("ANALYZE booking")
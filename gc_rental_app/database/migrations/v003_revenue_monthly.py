@@ -0,0 +1,82 @@
+"""Migration 3: revenue_monthly summary table maintained by triggers on booking"""
+
+from database.database_handler import DatabaseHandler
+
+VERSION = 3
+
+REVENUE_MONTHLY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS revenue_monthly (
+        month CHAR(7) PRIMARY KEY,
+        revenue_cents INTEGER NOT NULL DEFAULT 0,
+        bookings INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+# Amounts are kept in integer cents so repeated add/subtract never drifts
+ADD_COMPLETED = """
+    INSERT INTO revenue_monthly (month, revenue_cents, bookings)
+    VALUES (strftime('%Y-%m', NEW.start_date), CAST(ROUND(COALESCE(NEW.total_cost, 0) * 100) AS INTEGER), 1)
+    ON CONFLICT(month) DO UPDATE SET
+        revenue_cents = revenue_cents + excluded.revenue_cents,
+        bookings = bookings + 1;
+"""
+
+SUBTRACT_COMPLETED = """
+    UPDATE revenue_monthly SET
+        revenue_cents = revenue_cents - CAST(ROUND(COALESCE(OLD.total_cost, 0) * 100) AS INTEGER),
+        bookings = bookings - 1
+    WHERE month = strftime('%Y-%m', OLD.start_date);
+"""
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_revenue_monthly_insert
+    AFTER INSERT ON booking
+    WHEN NEW.status = 'completed'
+    BEGIN
+        {ADD_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_revenue_monthly_update_old
+    AFTER UPDATE OF status, total_cost, start_date ON booking
+    WHEN OLD.status = 'completed'
+    BEGIN
+        {SUBTRACT_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_revenue_monthly_update_new
+    AFTER UPDATE OF status, total_cost, start_date ON booking
+    WHEN NEW.status = 'completed'
+    BEGIN
+        {ADD_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_revenue_monthly_delete
+    AFTER DELETE ON booking
+    WHEN OLD.status = 'completed'
+    BEGIN
+        {SUBTRACT_COMPLETED}
+    END
+    """,
+]
+
+REBUILD = """
+    INSERT INTO revenue_monthly (month, revenue_cents, bookings)
+    SELECT strftime('%Y-%m', start_date),
+           SUM(CAST(ROUND(COALESCE(total_cost, 0) * 100) AS INTEGER)),
+           COUNT(*)
+    FROM booking
+    WHERE status = 'completed'
+    GROUP BY strftime('%Y-%m', start_date)
+"""
+
+def upgrade(db: DatabaseHandler):
+    """Create the summary table and its triggers, then fill it from existing bookings"""
+    db.execute(REVENUE_MONTHLY_SCHEMA)
+    for sql in TRIGGERS:
+        db.execute(sql)
+    db.execute("DELETE FROM revenue_monthly")
+    db.execute(REBUILD)
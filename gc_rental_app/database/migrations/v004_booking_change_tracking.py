@@ -0,0 +1,71 @@
+"""Migration 4: change counters and per row versions on booking for incremental readers"""
+
+from database.database_handler import DatabaseHandler
+
+VERSION = 4
+
+TABLE_VERSION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS table_version (
+        name VARCHAR(50) PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+# 'booking' counts inserts and updates, 'booking_deletes' counts deleted rows
+SEED_COUNTERS = """
+    INSERT OR IGNORE INTO table_version (name, version)
+    VALUES ('booking', 0), ('booking_deletes', 0)
+"""
+
+# Adding a column with a constant default does not rewrite existing rows
+ADD_ROW_VERSION = "ALTER TABLE booking ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0"
+
+ROW_VERSION_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_booking_row_version
+    ON booking (row_version)
+"""
+
+STAMP_ROW = """
+    UPDATE table_version SET version = version + 1 WHERE name = 'booking';
+    UPDATE booking
+    SET row_version = (SELECT version FROM table_version WHERE name = 'booking')
+    WHERE id = NEW.id;
+"""
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_booking_version_insert
+    AFTER INSERT ON booking
+    BEGIN
+        {STAMP_ROW}
+    END
+    """,
+    # row_version is left out of the column list so stamping a row does not re-fire this trigger
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_booking_version_update
+    AFTER UPDATE OF user_id, vehicle_id, start_date, end_date, status, total_cost ON booking
+    BEGIN
+        {STAMP_ROW}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_booking_version_delete
+    AFTER DELETE ON booking
+    BEGIN
+        UPDATE table_version SET version = version + 1 WHERE name = 'booking_deletes';
+    END
+    """,
+]
+
+def upgrade(db: DatabaseHandler):
+    """Create the counters, the row_version column and the triggers maintaining them"""
+    db.execute(TABLE_VERSION_SCHEMA)
+    db.execute(SEED_COUNTERS)
+
+    columns = {row["name"] for row in db.execute_and_fetch_all("PRAGMA table_info(booking)")}
+    if "row_version" not in columns:
+        db.execute(ADD_ROW_VERSION)
+
+    db.execute(ROW_VERSION_INDEX)
+    for sql in TRIGGERS:
+        db.execute(sql)
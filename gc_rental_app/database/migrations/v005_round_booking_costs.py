@@ -0,0 +1,21 @@
+"""Migration 5: round stored booking costs to whole cents"""
+
+from database.database_handler import DatabaseHandler
+from database.migration_runner import backfill_in_batches
+
+VERSION = 5
+
+# Rows are rewritten in committed id ranges so a large booking table never holds the write lock long
+TRANSACTIONAL = False
+
+# Only rows that actually change are rewritten, each rewrite also fires the revenue and version triggers
+ROUND_COSTS = """
+    UPDATE booking
+    SET total_cost = ROUND(total_cost, 2)
+    WHERE id BETWEEN ? AND ?
+    AND total_cost <> ROUND(total_cost, 2)
+"""
+
+def upgrade(db: DatabaseHandler):
+    """Round total_cost of existing bookings, new prices are rounded by BookingService"""
+    backfill_in_batches(db, "booking", ROUND_COSTS)
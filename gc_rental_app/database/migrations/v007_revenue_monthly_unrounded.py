@@ -0,0 +1,93 @@
+"""Migration 7: keep revenue_monthly unrounded so the summary matches SUM(total_cost)"""
+
+from database.database_handler import DatabaseHandler
+
+VERSION = 7
+
+# v003 added every booking rounded to whole cents, the summary drifted a few cents per month from
+# the aggregate the other engines compute. The table is small, it is recreated and refilled
+TRIGGER_NAMES = [
+    "trg_revenue_monthly_insert",
+    "trg_revenue_monthly_update_old",
+    "trg_revenue_monthly_update_new",
+    "trg_revenue_monthly_delete",
+]
+
+REVENUE_MONTHLY_SCHEMA = """
+    CREATE TABLE revenue_monthly (
+        month CHAR(7) PRIMARY KEY,
+        revenue REAL NOT NULL DEFAULT 0,
+        bookings INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+# Amounts are added unrounded like SUM(total_cost) does, readers round the monthly total to cents
+ADD_COMPLETED = """
+    INSERT INTO revenue_monthly (month, revenue, bookings)
+    VALUES (strftime('%Y-%m', NEW.start_date), COALESCE(NEW.total_cost, 0), 1)
+    ON CONFLICT(month) DO UPDATE SET
+        revenue = revenue + excluded.revenue,
+        bookings = bookings + 1;
+"""
+
+SUBTRACT_COMPLETED = """
+    UPDATE revenue_monthly SET
+        revenue = revenue - COALESCE(OLD.total_cost, 0),
+        bookings = bookings - 1
+    WHERE month = strftime('%Y-%m', OLD.start_date);
+"""
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER trg_revenue_monthly_insert
+    AFTER INSERT ON booking
+    WHEN NEW.status = 'completed'
+    BEGIN
+        {ADD_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_revenue_monthly_update_old
+    AFTER UPDATE OF status, total_cost, start_date ON booking
+    WHEN OLD.status = 'completed'
+    BEGIN
+        {SUBTRACT_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_revenue_monthly_update_new
+    AFTER UPDATE OF status, total_cost, start_date ON booking
+    WHEN NEW.status = 'completed'
+    BEGIN
+        {ADD_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_revenue_monthly_delete
+    AFTER DELETE ON booking
+    WHEN OLD.status = 'completed'
+    BEGIN
+        {SUBTRACT_COMPLETED}
+    END
+    """,
+]
+
+REBUILD = """
+    INSERT INTO revenue_monthly (month, revenue, bookings)
+    SELECT strftime('%Y-%m', start_date),
+           TOTAL(total_cost),
+           COUNT(*)
+    FROM booking
+    WHERE status = 'completed'
+    GROUP BY strftime('%Y-%m', start_date)
+"""
+
+def upgrade(db: DatabaseHandler):
+    """Replace the cents based summary table and its triggers, then refill it from bookings"""
+    for name in TRIGGER_NAMES:
+        db.execute(f"DROP TRIGGER IF EXISTS {name}")
+    db.execute("DROP TABLE IF EXISTS revenue_monthly")
+    db.execute(REVENUE_MONTHLY_SCHEMA)
+    for sql in TRIGGERS:
+        db.execute(sql)
+    db.execute(REBUILD)
@@ -2,53 +2,193 @@
 
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
 from typing import Optional
+from configs.app_constants import DB_TUNING_PROFILES, DB_TUNING_PROFILE, DB_STREAM_BATCH_SIZE
 from .database_handler import DatabaseHandler
 
+# Column types are decoded by sqlite3 itself (detect_types) from the declared column type,
+# so every query returns dates as date, timestamps as datetime and DECIMAL columns as float.
+# Computed columns have no declared type and come back as stored.
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DECIMAL", float)
+
 class SQLiteDBHandler(DatabaseHandler):
     """SQLite Database handler"""
 
     logger = logging.getLogger(__name__)
     _instance: Optional['SQLiteDBHandler'] = None
     _connection: Optional[sqlite3.Connection] = None
+    # Profile settings applied to every new connection, in this order
+    _TUNING_PRAGMAS = ("busy_timeout", "journal_mode", "synchronous",
+                       "mmap_size", "cache_size", "temp_store")
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, db_path):
-        """Abstract Method: Init with db path"""
+    def __init__(self, db_path, tuning_profile=DB_TUNING_PROFILE):
+        """Abstract Method: Init with db path and the storage tuning profile to apply"""
+        if tuning_profile not in DB_TUNING_PROFILES:
+            raise ValueError(f"Unknown database tuning profile: {tuning_profile}")
         self.__db_path = db_path
+        self.__tuning_profile = tuning_profile
+        self._transaction_state = threading.local()
         self._connect()
 
+    @property
+    def db_path(self):
+        """Path of the sqlite DB file"""
+        return self.__db_path
+
+    @property
+    def tuning_profile(self):
+        """Name of the storage tuning profile in use"""
+        return self.__tuning_profile
+
+    def _open_connection(self, check_same_thread=True) -> sqlite3.Connection:
+        """Open a new sqlite connection configured the way the app expects"""
+        connection = sqlite3.connect(
+            self.__db_path,
+            timeout = 5.0,
+            detect_types = sqlite3.PARSE_DECLTYPES,
+            check_same_thread = check_same_thread
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys = ON")
+        self._apply_tuning(connection)
+        return connection
+
+    def _apply_tuning(self, connection: sqlite3.Connection):
+        """Apply the pragmas of the selected tuning profile to a new connection"""
+        settings = DB_TUNING_PROFILES[self.__tuning_profile]
+        for pragma in self._TUNING_PRAGMAS:
+            connection.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+        SQLiteDBHandler.logger.debug("Applied '%s' tuning profile", self.__tuning_profile)
+
+    @staticmethod
+    def _optimize(connection: sqlite3.Connection):
+        """Let SQLite refresh its planner statistics before the connection goes away"""
+        try:
+            connection.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            SQLiteDBHandler.logger.warning("PRAGMA optimize failed: %s", e)
+
     def _connect(self):
         """Connect to the sqlite DB"""
         if self._connection is None:
-            self._connection = sqlite3.connect(
-                self.__db_path,
-                timeout = 5.0
-            )
-            self._connection.row_factory = sqlite3.Row
-            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection = self._open_connection()
             SQLiteDBHandler.logger.info("SQLite DB connection done")
         return self._connection
 
     def close(self):
         """Close the sqlite db connection"""
         if self._connection:
+            self._optimize(self._connection)
             self._connection.close()
             self._connection = None
             SQLiteDBHandler.logger.info("SQLite DB connection close")
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements as one unit of work.
+        Per statement commits are suppressed and a single commit happens at the end.
+        Nested blocks are mapped to savepoints so an inner failure only undoes its own work.
+        The outermost block takes the write lock up front (BEGIN IMMEDIATE): a deferred
+        transaction that reads before it writes cannot wait for a concurrent writer in WAL mode
+        and fails with "database is locked", while an immediate one waits on busy_timeout.
+        """
+        connection = self._connect()
+        depth = self._transaction_depth()
+        savepoint = f"sp_{depth}"
+
+        if depth == 0:
+            connection.execute("BEGIN IMMEDIATE")
+        else:
+            connection.execute(f"SAVEPOINT {savepoint}")
+        self._transaction_state.depth = depth + 1
+        # Callbacks registered from here on belong to this block
+        registered = len(self._after_transaction_callbacks())
+
+        try:
+            yield self
+        except BaseException:
+            self._transaction_state.depth = depth
+            # The work the callbacks were registered for has been undone
+            del self._after_transaction_callbacks()[registered:]
+            if depth == 0:
+                connection.rollback()
+            else:
+                connection.execute(f"ROLLBACK TO {savepoint}")
+                connection.execute(f"RELEASE {savepoint}")
+            SQLiteDBHandler.logger.debug("Transaction rolled back at depth %s", depth)
+            raise
+        else:
+            self._transaction_state.depth = depth
+            if depth == 0:
+                try:
+                    connection.commit()
+                finally:
+                    # Also after a failed commit, the callbacks only drop cached state
+                    self._run_after_transaction()
+            else:
+                connection.execute(f"RELEASE {savepoint}")
+
+    def after_transaction(self, callback):
+        """
+        Run callback once the transaction open on the current thread has been committed,
+        or right away when no transaction is open. Callbacks registered inside a transaction
+        or savepoint that rolls back are dropped.
+        Used to drop cached state that other threads could otherwise reload from
+        the last committed data before this transaction's changes become visible.
+        """
+        if self._transaction_depth() == 0:
+            callback()
+            return
+        self._after_transaction_callbacks().append(callback)
+
+    def _after_transaction_callbacks(self) -> list:
+        """Callbacks waiting for the transaction open on the current thread"""
+        callbacks = getattr(self._transaction_state, "callbacks", None)
+        if callbacks is None:
+            callbacks = self._transaction_state.callbacks = []
+        return callbacks
+
+    def _run_after_transaction(self):
+        """Run and clear the callbacks registered during the transaction that just committed"""
+        callbacks = self._after_transaction_callbacks()
+        self._transaction_state.callbacks = None
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                SQLiteDBHandler.logger.error("After transaction callback failed: %s", e)
+
+    def _transaction_depth(self) -> int:
+        """Nesting level of the transaction running on the current thread"""
+        return getattr(self._transaction_state, "depth", 0)
+
+    def _commit(self, connection: sqlite3.Connection):
+        """Commit unless the statement is part of an enclosing transaction"""
+        if self._transaction_depth() == 0:
+            connection.commit()
+
     def execute(self, sql, params=()):
         """Execute an sql statement"""
 
         try:
             SQLiteDBHandler.logger.debug("Start execution of the SQL command: %s", sql)
-            cursor = self._connection.cursor()
+            connection = self._connect()
+            cursor = connection.cursor()
             cursor.execute(sql, params)
-            self._connection.commit()
+            self._commit(connection)
             return cursor
         except sqlite3.Error as e:
             SQLiteDBHandler.logger.error("Execution of the SQL command failed: %s, error: %s", sql, e)
@@ -58,9 +198,10 @@ class SQLiteDBHandler(DatabaseHandler):
         """Execute more than one sql statement with given parameter array"""
         try:
             SQLiteDBHandler.logger.debug("Start execution of the SQL command: %s", sql)
-            cursor = self._connection.cursor()
+            connection = self._connect()
+            cursor = connection.cursor()
             cursor.executemany(sql, params)
-            self._connection.commit()
+            self._commit(connection)
             return cursor
         except sqlite3.Error as e:
             SQLiteDBHandler.logger.error("Execution of the SQL command failed: %s, error: %s", sql, e)
@@ -70,7 +211,7 @@ class SQLiteDBHandler(DatabaseHandler):
         """Execute sql statement and returns one record"""
         try:
             SQLiteDBHandler.logger.debug("Start execution of the SQL command: %s", sql)
-            cursor = self._connection.cursor()
+            cursor = self._connect().cursor()
             result = cursor.execute(sql, params)
             (record,) = result.fetchone()
             return record
@@ -83,9 +224,33 @@ class SQLiteDBHandler(DatabaseHandler):
 
         try:
             SQLiteDBHandler.logger.debug("Start execution of the SQL command: %s", sql)
-            cursor = self._connection.cursor()
+            cursor = self._connect().cursor()
             result = cursor.execute(sql, params)
             return result.fetchall()
         except sqlite3.Error as e:
             SQLiteDBHandler.logger.error("Execution of the SQL command failed: %s, error: %s", sql, e)
             raise
+
+    def execute_and_stream(self, sql, params=(), batch_size=None):
+        """
+        Execute sql statement and yield records one by one,
+        pulling them from sqlite in fetchmany batches so memory stays bounded
+        """
+        batch_size = batch_size or DB_STREAM_BATCH_SIZE
+        try:
+            SQLiteDBHandler.logger.debug("Start streaming the SQL command: %s", sql)
+            cursor = self._connect().cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(sql, params)
+        except sqlite3.Error as e:
+            SQLiteDBHandler.logger.error("Execution of the SQL command failed: %s, error: %s", sql, e)
+            raise
+
+        try:
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
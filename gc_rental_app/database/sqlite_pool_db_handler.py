@@ -0,0 +1,148 @@
+"""Pooled SQLite Database Module"""
+
+import sqlite3
+import logging
+import threading
+import weakref
+from collections import deque
+from typing import Optional
+from configs.app_constants import DB_TUNING_PROFILE
+from utils.exceptions import ConnectionPoolTimeout
+from .sqlite_db_handler import SQLiteDBHandler
+
+class _ConnectionLease:
+    """Holds the connection checked out by one thread"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.finalizer = None
+
+class SQLitePoolDBHandler(SQLiteDBHandler):
+    """
+    SQLite Database handler backed by a pool of connections.
+    Every thread works on its own connection, checked out from the pool on first use
+    and given back when the thread calls release() or terminates.
+    """
+
+    logger = logging.getLogger(__name__)
+    _instance: Optional['SQLitePoolDBHandler'] = None
+
+    def __init__(
+            self,
+            db_path,
+            pool_size=5,
+            checkout_timeout=5.0,
+            health_check=True,
+            tuning_profile=DB_TUNING_PROFILE
+        ):
+        """Init with db path, pool configuration and the storage tuning profile"""
+        if pool_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        # Singleton is being re-initialised, retire the previous pool first
+        if getattr(self, "_SQLitePoolDBHandler__slots", None) is not None:
+            self.close()
+        self.__pool_size = pool_size
+        self.__checkout_timeout = checkout_timeout
+        self.__health_check = health_check
+        self.__slots = threading.BoundedSemaphore(pool_size)
+        self.__idle: deque[sqlite3.Connection] = deque()
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        super().__init__(db_path, tuning_profile)
+
+    @property
+    def pool_size(self):
+        """Maximum number of connections handed out at the same time"""
+        return self.__pool_size
+
+    def _connect(self):
+        """Return the connection owned by the current thread, checking one out if needed"""
+        lease = getattr(self.__local, "lease", None)
+        if lease is not None:
+            return lease.connection
+
+        if not self.__slots.acquire(timeout=self.__checkout_timeout):
+            SQLitePoolDBHandler.logger.error(
+                "No pooled connection became available within %s seconds", self.__checkout_timeout
+            )
+            raise ConnectionPoolTimeout("Timed out waiting for a database connection")
+
+        try:
+            connection = self.__take_idle_connection()
+            if connection is None:
+                connection = self._open_connection(check_same_thread=False)
+                SQLitePoolDBHandler.logger.info("SQLite pooled connection opened")
+        except Exception:
+            self.__slots.release()
+            raise
+
+        lease = _ConnectionLease(connection)
+        # Hand the connection back automatically when the owning thread goes away
+        lease.finalizer = weakref.finalize(
+            lease, self.__check_in, connection, self.__slots, self.__idle, self.__lock
+        )
+        self.__local.lease = lease
+        return connection
+
+    def release(self):
+        """Give the connection of the current thread back to the pool"""
+        lease = getattr(self.__local, "lease", None)
+        if lease is None:
+            return
+        if self._transaction_depth() > 0:
+            raise RuntimeError("Cannot release a connection while a transaction is open")
+        del self.__local.lease
+        lease.finalizer()
+
+    def close(self):
+        """Close every idle pooled connection and the one owned by the current thread"""
+        self.release()
+        with self.__lock:
+            if self.__idle:
+                self._optimize(self.__idle[0])
+            while self.__idle:
+                self.__idle.popleft().close()
+        SQLitePoolDBHandler.logger.info("SQLite DB connection pool closed")
+
+    def __take_idle_connection(self) -> Optional[sqlite3.Connection]:
+        """Pop an idle connection, dropping the ones that fail the health check"""
+        while True:
+            with self.__lock:
+                if not self.__idle:
+                    return None
+                connection = self.__idle.popleft()
+
+            if not self.__health_check or self.__is_healthy(connection):
+                return connection
+
+            SQLitePoolDBHandler.logger.warning("Discarding unhealthy pooled connection")
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+
+    @staticmethod
+    def __check_in(connection: sqlite3.Connection, slots, idle, lock):
+        """
+        Return a connection to the idle list and free its slot.
+        The pool structures are passed in so a lease always goes back to the pool it came from.
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            with lock:
+                idle.append(connection)
+        except sqlite3.Error as e:
+            SQLitePoolDBHandler.logger.error("Failed to return connection to the pool: %s", e)
+            connection.close()
+        finally:
+            slots.release()
+
+    @staticmethod
+    def __is_healthy(connection: sqlite3.Connection) -> bool:
+        """Run a trivial query to make sure the connection is still usable"""
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
@@ -0,0 +1,37 @@
+"""Read-only SQLite Database Module"""
+
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Optional
+from .sqlite_db_handler import SQLiteDBHandler
+
+class SQLiteReadOnlyDBHandler(SQLiteDBHandler):
+    """
+    SQLite Database handler that opens the DB file in read-only mode.
+    Used by report worker processes, which must never write and should not share
+    the connection of the application handler.
+    """
+
+    logger = logging.getLogger(__name__)
+    _instance: Optional['SQLiteReadOnlyDBHandler'] = None
+    _connection: Optional[sqlite3.Connection] = None
+    # The journal mode is a property of the DB file and can only be changed by a writer
+    _TUNING_PRAGMAS = ("busy_timeout", "mmap_size", "cache_size", "temp_store")
+
+    def _open_connection(self, check_same_thread=True) -> sqlite3.Connection:
+        """Open the DB file through a mode=ro URI"""
+        connection = sqlite3.connect(
+            Path(self.db_path).resolve().as_uri() + "?mode=ro",
+            uri = True,
+            timeout = 5.0,
+            detect_types = sqlite3.PARSE_DECLTYPES,
+            check_same_thread = check_same_thread
+        )
+        connection.row_factory = sqlite3.Row
+        self._apply_tuning(connection)
+        return connection
+
+    @staticmethod
+    def _optimize(connection: sqlite3.Connection):
+        """PRAGMA optimize may write planner statistics, leave it to the application handler"""
@@ -5,11 +5,13 @@ from services.auth_service import AuthService
 from services.vehicle_service import VehicleService
 from services.bookings_service import BookingService
 from services.booking_analytics_service import BookingAnalyticsService
-from database.sqlite_db_handler import SQLiteDBHandler
+from services.availability_index import AvailabilityIndex
+from services.report_executor import ReportExecutor
+from database.sqlite_pool_db_handler import SQLitePoolDBHandler
 from database.schema import SchemaHandler
 from cui.gc_rental_app import GCRentalApp
 from cui.session import Session
-from configs.app_constants import DB_FILE_NAME
+from configs.app_constants import DB_FILE_NAME, DB_POOL_SIZE, DB_POOL_CHECKOUT_TIMEOUT
 from repositories.user_repository import UserRepo
 from repositories.vehicle_repository import VehicleRepository
 from repositories.bookings_repository import BookingsRepository
@@ -21,8 +23,12 @@ def main():
     setup_logging()
     logger = logging.getLogger(__name__)
 
-    # Initialize the SQLite Database
-    db = SQLiteDBHandler(DB_FILE_NAME)
+    # Initialize the SQLite Database, every thread gets its own pooled connection
+    db = SQLitePoolDBHandler(
+        DB_FILE_NAME,
+        pool_size=DB_POOL_SIZE,
+        checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT
+    )
     # Run schemas to create tables
     SchemaHandler.initialise(db)
 
@@ -35,7 +41,17 @@ def main():
     auth_service = AuthService(user_repo)
     vehicle_service = VehicleService(vehicle_repo)
     analytics_service = BookingAnalyticsService(booking_repo)
-    bookings_service = BookingService(booking_repo, vehicle_repo, analytics_service)
+    availability_index = AvailabilityIndex(booking_repo)
+    # Heavy reports run in worker processes on read-only connections
+    report_executor = ReportExecutor(DB_FILE_NAME, booking_repo)
+    bookings_service = BookingService(
+        booking_repo,
+        vehicle_repo,
+        analytics_service,
+        db,
+        availability_index,
+        report_executor=report_executor
+    )
     
     # Show Initial Menu
     rental_app = GCRentalApp(
@@ -1,16 +1,42 @@
 """Bookings Repository"""
 
+import threading
+from collections.abc import Iterator
+from itertools import islice
 from datetime import date
-from decimal import Decimal
 from database.database_handler import DatabaseHandler
-from configs.app_constants import BookingStatus
+from configs.app_constants import BookingStatus, DB_IN_BATCH_SIZE
 from .entities.booking import Booking 
+from .entities.booking_detail import BookingDetail
 from .entities.vehicle import Vehicle
 
+# Columns a booking detail query can project and the joined column each one reads
+DETAIL_COLUMNS = {
+    "id": "b.id",
+    "user_id": "b.user_id",
+    "vehicle_id": "b.vehicle_id",
+    "start_date": "b.start_date",
+    "end_date": "b.end_date",
+    "status": "b.status",
+    "total_cost": "b.total_cost",
+    "plate_number": "v.plate_number",
+    "make": "v.make",
+    "model": "v.model",
+    "username": "u.username",
+}
+
 class BookingsRepository:
-    """Methods related to vehicle repo"""
+    """
+    Methods related to vehicle repo.
+    Inserts and updates made through this repository are logged in memory once committed, so
+    incremental readers can re-read just those rows, see get_change_versions and iter_booking_rows
+    """
     def __init__(self, db: DatabaseHandler):
         self.__db = db
+        # Change counter and the counter value of the last committed change per booking id
+        self.__change_version = 0
+        self.__changed: dict[int, int] = {}
+        self.__change_lock = threading.Lock()
 
     def add(self, booking: Booking):
         """Add booking into DB"""
@@ -23,13 +49,14 @@ class BookingsRepository:
             (
                 booking.user_id,
                 booking.vehicle_id,
-                booking.start_date.isoformat(),
-                booking.end_date.isoformat(),
+                booking.start_date,
+                booking.end_date,
                 booking.status,
                 booking.total_cost
             )
         )
         booking.id = cursor.lastrowid  # set the generated booking ID
+        self.__log_change(booking.id)
         return booking
 
     def get_bookings_by_status(self, status: BookingStatus) -> list[Booking]:
@@ -44,22 +71,7 @@ class BookingsRepository:
         )
 
         rows = cursor.fetchall()
-
-        bookings = []
-        for row in rows:
-            bookings.append(
-                Booking(
-                    booking_id=row["id"],
-                    user_id=row["user_id"],
-                    vehicle_id=row["vehicle_id"],
-                    start_date=date.fromisoformat(row["start_date"]),
-                    end_date=date.fromisoformat(row["end_date"]),
-                    status=row["status"],
-                    total_cost=Decimal(row["total_cost"]) if row["total_cost"] else None
-                )
-            )
-
-        return bookings
+        return [Booking.from_row(row) for row in rows]
 
     def update(
         self,
@@ -77,6 +89,8 @@ class BookingsRepository:
             (booking.status, booking.total_cost, booking.id)
         )
 
+        if cursor.rowcount > 0:
+            self.__log_change(booking.id)
         return cursor.rowcount > 0
     
     def update_booking_status(
@@ -95,7 +109,18 @@ class BookingsRepository:
             (new_status.value, booking_id)
         )
 
+        if cursor.rowcount > 0:
+            self.__log_change(booking_id)
         return cursor.rowcount > 0
+
+    def __log_change(self, booking_id: int):
+        """Log a written booking once the enclosing transaction commits, rolled back writes never show up"""
+        self.__db.after_transaction(lambda: self.__record_change(booking_id))
+
+    def __record_change(self, booking_id: int):
+        with self.__change_lock:
+            self.__change_version += 1
+            self.__changed[booking_id] = self.__change_version
     
     def get_by_booking_id(self, booking_id: int) -> Booking | None:
         """Get booking by booking id"""
@@ -116,15 +141,7 @@ class BookingsRepository:
         if not row:
             return None
 
-        return Booking(
-            booking_id=row[0],
-            user_id=row[1],
-            vehicle_id=row[2],
-            start_date=row[3],
-            end_date=row[4],
-            status=row[5],
-            total_cost=row[6]
-        )
+        return Booking.from_row(row)
 
     def get_by_user_id(self, user_id: int) -> list[Booking]:
         """Get all bookings for a given user"""
@@ -137,20 +154,7 @@ class BookingsRepository:
         cursor = self.__db.execute(sql, (user_id,))
         rows = cursor.fetchall()
 
-        bookings = []
-        for row in rows:
-            bookings.append(
-                Booking(
-                    booking_id=row[0],
-                    user_id=row[1],
-                    vehicle_id=row[2],
-                    start_date=row[3],
-                    end_date=row[4],
-                    status=row[5],
-                    total_cost=row[6]
-                )
-            )
-        return bookings
+        return [Booking.from_row(row) for row in rows]
 
     def get_all(self) -> list[Booking]:
         """Get all bookings"""
@@ -161,37 +165,283 @@ class BookingsRepository:
         """
         cursor = self.__db.execute(sql)
         rows = cursor.fetchall()
-        bookings = []
-        for row in rows:
-            bookings.append(
-                Booking(
-                    booking_id=row[0],
-                    user_id=row[1],
-                    vehicle_id=row[2],
-                    start_date=row[3],
-                    end_date=row[4],
-                    status=row[5],
-                    total_cost=row[6]
-                )
-            )
-        return bookings
+        return [Booking.from_row(row) for row in rows]
+
+    def get_booking_details(
+            self,
+            columns=None,
+            status: BookingStatus | None = None,
+            page_size: int | None = None,
+            after_id: int | None = None,
+            before_id: int | None = None
+        ) -> list[BookingDetail]:
+        """
+        Bookings with their vehicle plate/make/model and username in one query.
+        columns limits the select list to the given BookingDetail fields (id is always included),
+        vehicle and user are only joined when one of their columns is requested.
+        Without page_size every matching booking is returned ordered by id, with page_size
+        it returns a keyset page newest first like get_all.
+        """
+        columns = list(BookingDetail._fields if columns is None else dict.fromkeys(("id", *columns)))
+        unknown = [column for column in columns if column not in DETAIL_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown booking detail columns: {', '.join(unknown)}")
+
+        selected = [DETAIL_COLUMNS[column] for column in columns]
+        sql = "SELECT " + ", ".join(f"{source} AS {column}" for source, column in zip(selected, columns))
+        sql += " FROM booking b"
+        # Both joins are primary key lookups
+        if any(source.startswith("v.") for source in selected):
+            sql += " LEFT JOIN vehicle v ON v.id = b.vehicle_id"
+        if any(source.startswith("u.") for source in selected):
+            sql += " LEFT JOIN user u ON u.id = b.user_id"
+
+        conditions = []
+        params = []
+        if status is not None:
+            conditions.append("b.status = ?")
+            params.append(status.value)
+        if page_size is not None and before_id is not None:
+            conditions.append("b.id > ?")
+            params.append(before_id)
+        elif page_size is not None and after_id is not None:
+            conditions.append("b.id < ?")
+            params.append(after_id)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        if page_size is None:
+            sql += " ORDER BY b.id"
+        else:
+            sql += " ORDER BY b.id ASC LIMIT ?" if before_id is not None else " ORDER BY b.id DESC LIMIT ?"
+            params.append(page_size)
+
+        rows = self.__db.execute_and_fetch_all(sql, tuple(params))
+        if page_size is not None and before_id is not None:
+            rows.reverse()
+        return [BookingDetail.from_row(row) for row in rows]
+
+    def iter_all(self, batch_size: int | None = None) -> Iterator[Booking]:
+        """Stream all bookings without loading the whole table into memory"""
+        sql = """
+        SELECT id, user_id, vehicle_id, start_date, end_date, status, total_cost
+        FROM booking
+        ORDER BY id DESC
+        """
+        for row in self.__db.execute_and_stream(sql, batch_size=batch_size):
+            yield Booking.from_row(row)
     
     def is_vehicle_booked(self, vehicle_id: int, start_date: date, end_date: date) -> bool:
         """
         Return True if the vehicle has a booking that overlaps the given date range
-        with status 'pending' or 'confirmed'.
+        with status 'pending' or 'approved'.
         """
         sql = """
         SELECT 1
         FROM booking
         WHERE vehicle_id = ?
-        AND status IN ('pending', 'confirmed')
-        AND NOT (end_date < ? OR start_date > ?)
+        AND status IN ('pending', 'approved')
+        AND start_date <= ?
+        AND end_date >= ?
         LIMIT 1
         """
-        cursor = self.__db.execute(sql, (vehicle_id, start_date.isoformat(), end_date.isoformat()))
+        cursor = self.__db.execute(sql, (vehicle_id, end_date, start_date))
         return cursor.fetchone() is not None
-    
+
+    def get_active_intervals(self) -> list[tuple[int, int, date, date]]:
+        """
+        Return (booking id, vehicle id, start date, end date) of every pending or approved booking,
+        ordered by vehicle and start date
+        """
+        sql = """
+        SELECT id, vehicle_id, start_date, end_date
+        FROM booking
+        WHERE status IN ('pending', 'approved')
+        AND vehicle_id IS NOT NULL
+        ORDER BY vehicle_id, start_date, id
+        """
+        return [tuple(row) for row in self.__db.execute_and_stream(sql)]
+
+    def get_active_bookings_between(self, start_date: date, end_date: date) -> list[tuple[int, date, date]]:
+        """Return (vehicle id, start date, end date) of pending or approved bookings touching the range"""
+        sql = """
+        SELECT vehicle_id, start_date, end_date
+        FROM booking
+        WHERE status IN ('pending', 'approved')
+        AND vehicle_id IS NOT NULL
+        AND start_date <= ?
+        AND end_date >= ?
+        """
+        rows = self.__db.execute_and_fetch_all(sql, (end_date, start_date))
+        return [tuple(row) for row in rows]
+
+    def iter_occupancy_intervals(self, start_date: date, end_date: date) -> Iterator[tuple[int, int, int]]:
+        """
+        Stream (vehicle id, start day, end day) of approved or completed bookings touching the range.
+        Days are counted from 1970-01-01 so they load straight into datetime64[D] compatible arrays
+        """
+        sql = """
+        SELECT vehicle_id,
+               CAST(julianday(start_date) - 2440587.5 AS INTEGER),
+               CAST(julianday(end_date) - 2440587.5 AS INTEGER)
+        FROM booking
+        WHERE status IN ('approved', 'completed')
+        AND vehicle_id IS NOT NULL
+        AND start_date <= ?
+        AND end_date >= ?
+        """
+        for row in self.__db.execute_and_stream(sql, (end_date, start_date)):
+            yield row[0], row[1], row[2]
+
+    def iter_start_dates(self) -> Iterator[tuple[int, date]]:
+        """Stream (vehicle id, start date) of every booking ordered by vehicle and start date"""
+        sql = """
+        SELECT vehicle_id, start_date
+        FROM booking
+        WHERE vehicle_id IS NOT NULL
+        ORDER BY vehicle_id, start_date
+        """
+        for row in self.__db.execute_and_stream(sql):
+            yield row[0], row[1]
+
+    def get_monthly_revenue(self, status: BookingStatus) -> list[tuple[str, float]]:
+        """Return (YYYY-MM, revenue) of bookings with the given status, aggregated in sqlite"""
+        sql = """
+        SELECT strftime('%Y-%m', start_date) AS month, SUM(total_cost) AS revenue
+        FROM booking
+        WHERE status = ?
+        GROUP BY month
+        ORDER BY month
+        """
+        return [(row[0], row[1] or 0) for row in self.__db.execute_and_stream(sql, (status.value,))]
+
+    def get_monthly_revenue_summary(self) -> list[tuple[str, float]]:
+        """
+        Return (YYYY-MM, revenue) of completed bookings from the trigger maintained summary table.
+        Revenue is the unrounded sum like get_monthly_revenue returns, callers round it to cents
+        """
+        sql = """
+        SELECT month, revenue
+        FROM revenue_monthly
+        WHERE bookings > 0
+        ORDER BY month
+        """
+        return [(row[0], row[1]) for row in self.__db.execute_and_fetch_all(sql)]
+
+    def rebuild_revenue_summary(self):
+        """Recompute the revenue_monthly table from the booking table"""
+        with self.__db.transaction():
+            self.__db.execute("DELETE FROM revenue_monthly")
+            self.__db.execute(
+                """
+                INSERT INTO revenue_monthly (month, revenue, bookings)
+                SELECT strftime('%Y-%m', start_date),
+                       TOTAL(total_cost),
+                       COUNT(*)
+                FROM booking
+                WHERE status = 'completed'
+                GROUP BY strftime('%Y-%m', start_date)
+                """
+            )
+
+    def get_change_versions(self) -> tuple[int, int]:
+        """
+        Return (change counter, rebuild counter) of the booking table.
+        The change counter counts inserts and updates committed through this repository, the
+        rebuild counter is kept by triggers and counts deletes and user/vehicle ids cleared when
+        the user or vehicle was deleted. Other writes are not tracked
+        """
+        rebuilds = self.__db.execute_and_fetch_one(
+            "SELECT COALESCE(MAX(version), 0) FROM table_version WHERE name = 'booking_rebuild'"
+        )
+        with self.__change_lock:
+            return self.__change_version, rebuilds
+
+    def iter_booking_rows(
+        self,
+        changed_since: int | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        vehicle_range: tuple[int, int] | None = None,
+        unassigned_vehicle: bool = False
+    ) -> Iterator[tuple]:
+        """
+        Stream raw (id, user_id, vehicle_id, start_date, end_date, status, total_cost) tuples,
+        optionally only the rows inserted or updated after the given change counter value,
+        starting within [start_date, end_date], booked on a vehicle id in vehicle_range
+        or, with unassigned_vehicle, left without a vehicle after the vehicle was deleted.
+        Dates stay ISO text here, analytics frames parse whole columns of them in NumPy
+        """
+        sql = """
+        SELECT id, user_id, vehicle_id,
+               CAST(start_date AS TEXT), CAST(end_date AS TEXT),
+               status, total_cost
+        FROM booking
+        """
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("start_date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("start_date <= ?")
+            params.append(end_date)
+        if vehicle_range is not None:
+            conditions.append("vehicle_id BETWEEN ? AND ?")
+            params.extend(vehicle_range)
+        if unassigned_vehicle:
+            conditions.append("vehicle_id IS NULL")
+
+        if changed_since is None:
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            sql += " ORDER BY id"
+            for row in self.__db.execute_and_stream(sql, tuple(params)):
+                yield tuple(row)
+            return
+
+        with self.__change_lock:
+            booking_ids = sorted(
+                booking_id for booking_id, version in self.__changed.items() if version > changed_since
+            )
+        # Sorted id batches keep the rows in id order across the primary key lookups
+        for start in range(0, len(booking_ids), DB_IN_BATCH_SIZE):
+            batch = booking_ids[start:start + DB_IN_BATCH_SIZE]
+            batch_sql = sql + " WHERE " + " AND ".join(
+                [f"id IN ({', '.join('?' * len(batch))})", *conditions]
+            ) + " ORDER BY id"
+            for row in self.__db.execute_and_stream(batch_sql, (*batch, *params)):
+                yield tuple(row)
+
+    def iter_booking_row_chunks(self, chunk_size: int, **filters) -> Iterator[list[tuple]]:
+        """
+        Stream raw booking tuples grouped into lists of at most chunk_size rows,
+        filters are passed on to iter_booking_rows
+        """
+        rows = self.iter_booking_rows(**filters)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+    def get_partition_bounds(self) -> tuple | None:
+        """
+        Return (first start date, last start date, lowest vehicle id, highest vehicle id,
+        number of bookings without a vehicle) over all bookings, used to split reports into partitions.
+        The vehicle ids are None when no booking has a vehicle. None when there are no bookings
+        """
+        (row,) = self.__db.execute_and_fetch_all(
+            """
+            SELECT MIN(start_date), MAX(start_date), MIN(vehicle_id), MAX(vehicle_id),
+                   SUM(vehicle_id IS NULL)
+            FROM booking
+            """
+        )
+        if row[0] is None:
+            return None
+        return tuple(row)
+
     def get_available_vehicles(
         self,
         start_date: date,
@@ -199,32 +449,19 @@ class BookingsRepository:
     ) -> list[Vehicle]:
         """Get the all the vehicles that are available for booking for the given date range"""
 
+        # Correlated NOT EXISTS probes idx_booking_vehicle_status_dates once per vehicle
         sql = """
-        SELECT *
-        FROM vehicles v
-        WHERE v.id NOT IN (
-            SELECT vehicle_id
-            FROM booking
-            WHERE status IN ('pending', 'confirmed')
-              AND NOT (end_date < ? OR start_date > ?)
+        SELECT v.*
+        FROM vehicle v
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM booking b
+            WHERE b.vehicle_id = v.id
+              AND b.status IN ('pending', 'approved')
+              AND b.start_date <= ?
+              AND b.end_date >= ?
         )
         """
-        cursor = self.__db.execute(sql, (start_date.isoformat(), end_date.isoformat()))
+        cursor = self.__db.execute(sql, (end_date, start_date))
         rows = cursor.fetchall()
-
-        vehicles = []
-        for row in rows:
-            vehicles.append(
-                Vehicle(
-                    plate_number=row["plate_number"],
-                    make=row["make"],
-                    model=row["model"],
-                    year=row["year"],
-                    mileage=row["mileage"],
-                    daily_rate=row["daily_rate"],
-                    min_rent_period=row["min_rent_period"],
-                    max_rent_period=row["max_rent_period"],
-                    vehicle_id=row["id"]
-                )
-            )
-        return vehicles
+        return [Vehicle.from_row(row) for row in rows]
@@ -1,12 +1,16 @@
 
 from datetime import date
-from decimal import Decimal
 from typing import Optional
 
 
 class Booking:
     """Represents a Booking entity in the car rental system"""
 
+    # Slots instead of a per instance __dict__, bookings are loaded in bulk
+    __slots__ = ("__id", "__user_id", "__vehicle_id", "__start_date", "__end_date", "__status", "__total_cost")
+    # Booking table columns in the order from_row expects them
+    COLUMNS = ("id", "user_id", "vehicle_id", "start_date", "end_date", "status", "total_cost")
+
     def __init__(
         self,
         user_id: int,
@@ -14,7 +18,7 @@ class Booking:
         start_date: date,
         end_date: date,
         status: str = "pending",
-        total_cost: Optional[Decimal] = None,
+        total_cost: Optional[float] = None,
         booking_id: Optional[int] = None
     ):
         self.__id = booking_id
@@ -65,3 +69,13 @@ class Booking:
     def total_cost(self, value):
         self.__total_cost = value
 
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a booking from a row starting with COLUMNS in that order (SELECT * or an explicit
+        column list). Slots are filled by position, skipping __init__ keyword handling.
+        """
+        booking = cls.__new__(cls)
+        (booking.__id, booking.__user_id, booking.__vehicle_id, booking.__start_date,
+         booking.__end_date, booking.__status, booking.__total_cost) = row[:7]
+        return booking
@@ -0,0 +1,28 @@
+"""Booking Detail read model"""
+
+from datetime import date
+from typing import NamedTuple, Optional
+
+
+class BookingDetail(NamedTuple):
+    """
+    Read model of a booking joined with its vehicle and the user who made it.
+    Built by projected queries, fields that were not selected are None.
+    """
+
+    id: int
+    user_id: Optional[int] = None
+    vehicle_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    status: Optional[str] = None
+    total_cost: Optional[float] = None
+    plate_number: Optional[str] = None
+    make: Optional[str] = None
+    model: Optional[str] = None
+    username: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a detail from a row whose column names are BookingDetail fields"""
+        return cls(**dict(zip(row.keys(), row)))
@@ -2,6 +2,11 @@
 
 class User():
     """Represents a User entity in the car rental system"""
+
+    __slots__ = ("__user_id", "__fullname", "__username", "__password", "__mobile", "__role")
+    # User table columns in the order from_row expects them
+    COLUMNS = ("id", "fullname", "username", "password", "mobile", "role")
+
     def __init__(self, fullname, username, password, mobile, role, user_id = 0):
         self.__user_id = user_id
         self.__fullname = fullname
@@ -39,3 +44,11 @@ class User():
     def role(self):
         """return role"""
         return self.__role
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a user from a row starting with COLUMNS in that order, filling slots by position"""
+        user = cls.__new__(cls)
+        (user.__user_id, user.__fullname, user.__username, user.__password,
+         user.__mobile, user.__role) = row[:6]
+        return user
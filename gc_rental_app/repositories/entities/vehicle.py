@@ -3,6 +3,12 @@
 class Vehicle:
     """Represents a vehicle entity in the car rental system"""
 
+    __slots__ = ("__vehicle_id", "__plate_number", "__make", "__model", "__year", "__mileage",
+                 "__daily_rate", "__min_rent_period", "__max_rent_period")
+    # Vehicle table columns in the order from_row expects them
+    COLUMNS = ("id", "plate_number", "make", "model", "year", "mileage",
+               "daily_rate", "min_rent_period", "max_rent_period")
+
     def __init__(
         self,
         plate_number: str,
@@ -63,14 +69,9 @@ class Vehicle:
     
     @classmethod
     def from_row(cls, row):
-        return Vehicle(
-            plate_number=row["plate_number"],
-            make=row["make"],
-            model=row["model"],
-            year=row["year"],
-            mileage=row["mileage"],
-            daily_rate=row["daily_rate"],
-            min_rent_period=row["min_rent_period"],
-            max_rent_period=row["max_rent_period"],
-            vehicle_id=row["id"]
-        )
+        """Build a vehicle from a row starting with COLUMNS in that order, filling slots by position"""
+        vehicle = cls.__new__(cls)
+        (vehicle.__vehicle_id, vehicle.__plate_number, vehicle.__make, vehicle.__model, vehicle.__year,
+         vehicle.__mileage, vehicle.__daily_rate, vehicle.__min_rent_period,
+         vehicle.__max_rent_period) = row[:9]
+        return vehicle
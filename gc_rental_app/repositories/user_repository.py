@@ -32,7 +32,7 @@ class UserRepo():
         if not row:
             return None
 
-        return User(row[1], row[2], row[3], row[4], row[5], row[0])
+        return User.from_row(row)
     
     def authenticate(self, username, plain_password):
         """Verify the username and password and return true if password matches"""
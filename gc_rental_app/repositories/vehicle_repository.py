@@ -1,16 +1,50 @@
 """Vehicle Repository"""
 
 import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
 from datetime import date
 from database.database_handler import DatabaseHandler
+from configs.app_constants import VEHICLE_CACHE_SIZE, DB_IN_BATCH_SIZE
 from .entities.vehicle import Vehicle
 
 logger = logging.getLogger(__name__)
 
 class VehicleRepository:
-    """Methods related to vehicle repo"""
-    def __init__(self, db: DatabaseHandler):
+    """
+    Methods related to vehicle repo.
+    get_by_id and get_by_plate are served from an LRU identity map of up to cache_size vehicles.
+    Writes made through this repository evict the affected vehicle, again once their transaction
+    has committed, changes made to the vehicle table by other means are only seen after clear_cache().
+    """
+    def __init__(self, db: DatabaseHandler, cache_size: int = VEHICLE_CACHE_SIZE):
         self.__db = db
+        self.__cache_size = cache_size
+        self.__cache: OrderedDict[int, Vehicle] = OrderedDict()
+        self.__plate_ids: dict[str, int] = {}
+        self.__cache_lock = threading.Lock()
+        # Bumped on every eviction, a load that overlaps an eviction is not cached
+        self.__generation = 0
+        self.__cache_hits = 0
+        self.__cache_misses = 0
+
+    @property
+    def cache_hits(self) -> int:
+        """Lookups answered from the identity map"""
+        return self.__cache_hits
+
+    @property
+    def cache_misses(self) -> int:
+        """Lookups that had to query the database"""
+        return self.__cache_misses
+
+    def clear_cache(self):
+        """Drop every cached vehicle, counters are kept"""
+        with self.__cache_lock:
+            self.__cache.clear()
+            self.__plate_ids.clear()
+            self.__generation += 1
 
     def add(self, vehicle: Vehicle):
         """Add vehicle to the table"""
@@ -33,6 +67,7 @@ class VehicleRepository:
             vehicle.max_rent_period
         )
         self.__db.execute(sql, params)
+        self.__invalidate(plate_number=vehicle.plate_number)
 
     def update(self, vehicle: Vehicle):
         """Update vehicle"""
@@ -56,11 +91,13 @@ class VehicleRepository:
             vehicle.vehicle_id
         )
         self.__db.execute(sql, params)
+        self.__invalidate(vehicle_id=vehicle.vehicle_id)
 
     def remove(self, vehicle_id):
         """Delete record from vehicle table"""
         sql = "DELETE FROM vehicle WHERE id = ?"
         self.__db.execute(sql, (vehicle_id,))
+        self.__invalidate(vehicle_id=vehicle_id)
 
     def get_all(self):
         """Get all vehicles"""
@@ -68,23 +105,85 @@ class VehicleRepository:
         rows = cursor.fetchall()
         return [Vehicle.from_row(row) for row in rows]
 
+    def get_page(
+            self,
+            page_size: int,
+            after_id: int | None = None,
+            before_id: int | None = None
+        ) -> list[Vehicle]:
+        """
+        Keyset page of vehicles ordered by id.
+        after_id returns the page following that vehicle, before_id the page preceding it.
+        """
+        if before_id is not None:
+            sql = "SELECT * FROM vehicle WHERE id < ? ORDER BY id DESC LIMIT ?"
+            rows = self.__db.execute_and_fetch_all(sql, (before_id, page_size))
+            rows.reverse()
+        elif after_id is not None:
+            sql = "SELECT * FROM vehicle WHERE id > ? ORDER BY id ASC LIMIT ?"
+            rows = self.__db.execute_and_fetch_all(sql, (after_id, page_size))
+        else:
+            sql = "SELECT * FROM vehicle ORDER BY id ASC LIMIT ?"
+            rows = self.__db.execute_and_fetch_all(sql, (page_size,))
+        return [Vehicle.from_row(row) for row in rows]
+
+    def iter_all(self, batch_size: int | None = None) -> Iterator[Vehicle]:
+        """Stream all vehicles without loading the whole table into memory"""
+        for row in self.__db.execute_and_stream("SELECT * FROM vehicle", batch_size=batch_size):
+            yield Vehicle.from_row(row)
+
     def get_by_id(self, vehicle_id):
         """Search vehicle using id"""
+        vehicle, generation = self.__cached(vehicle_id=vehicle_id)
+        if vehicle is not None:
+            return vehicle
         cursor = self.__db.execute(
                 "SELECT * FROM vehicle WHERE id = ?",
                 (vehicle_id,)
             )
         row = cursor.fetchone()
-        return Vehicle.from_row(row) if row else None
+        return self.__remember(Vehicle.from_row(row), generation) if row else None
+
+    def get_by_ids(self, vehicle_ids) -> dict[int, Vehicle]:
+        """
+        Look up many vehicles at once, returns {vehicle id: Vehicle} for the ids that exist.
+        Cached vehicles are taken from the identity map, the rest are loaded with IN (...) queries
+        """
+        vehicles: dict[int, Vehicle] = {}
+        missing = []
+        generation = None
+        for vehicle_id in {vehicle_id for vehicle_id in vehicle_ids if vehicle_id is not None}:
+            vehicle, vehicle_generation = self.__cached(vehicle_id=vehicle_id)
+            # The oldest generation seen is the one the loads below must not outlive
+            if generation is None:
+                generation = vehicle_generation
+            if vehicle is None:
+                missing.append(vehicle_id)
+            else:
+                vehicles[vehicle_id] = vehicle
+
+        for start in range(0, len(missing), DB_IN_BATCH_SIZE):
+            batch = missing[start:start + DB_IN_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = self.__db.execute_and_fetch_all(
+                f"SELECT * FROM vehicle WHERE id IN ({placeholders})", tuple(batch)
+            )
+            for row in rows:
+                vehicle = self.__remember(Vehicle.from_row(row), generation)
+                vehicles[vehicle.vehicle_id] = vehicle
+        return vehicles
 
     def get_by_plate(self, plate_number):
         """Search vehicle by plate number"""
+        vehicle, generation = self.__cached(plate_number=plate_number)
+        if vehicle is not None:
+            return vehicle
         cursor = self.__db.execute(
                 "SELECT * FROM vehicle WHERE plate_number = ?",
                 (plate_number,)
             )
         row = cursor.fetchone()
-        return Vehicle.from_row(row) if row else None
+        return self.__remember(Vehicle.from_row(row), generation) if row else None
     
     def update_vehicle_mileage(self, vehicle_id: int, new_mileage: int):
         """Repo method to update the mileage for given vehicles"""
@@ -95,5 +194,60 @@ class VehicleRepository:
         WHERE id = ?
         """
         self.__db.execute(sql, (new_mileage, vehicle_id))
+        self.__invalidate(vehicle_id=vehicle_id)
+
+    def __cached(self, vehicle_id=None, plate_number=None) -> tuple[Vehicle | None, int]:
+        """
+        Look a vehicle up in the identity map by id or plate, counting hits and misses.
+        Returns (vehicle or None, eviction generation to hand to __remember after a load)
+        """
+        with self.__cache_lock:
+            if plate_number is not None:
+                vehicle_id = self.__plate_ids.get(plate_number)
+            vehicle = self.__cache.get(vehicle_id)
+            if vehicle is None:
+                self.__cache_misses += 1
+                return None, self.__generation
+            self.__cache.move_to_end(vehicle_id)
+            self.__cache_hits += 1
+            return vehicle, self.__generation
+
+    def __remember(self, vehicle: Vehicle, generation: int) -> Vehicle:
+        """
+        Add a freshly loaded vehicle to the identity map, evicting the least recently used.
+        Skipped when a write evicted anything since the load started, the row read may be stale
+        """
+        if self.__cache_size <= 0:
+            return vehicle
+        with self.__cache_lock:
+            if generation != self.__generation:
+                return vehicle
+            previous = self.__cache.pop(vehicle.vehicle_id, None)
+            if previous is not None:
+                self.__plate_ids.pop(previous.plate_number, None)
+            self.__cache[vehicle.vehicle_id] = vehicle
+            self.__plate_ids[vehicle.plate_number] = vehicle.vehicle_id
+            while len(self.__cache) > self.__cache_size:
+                _, evicted = self.__cache.popitem(last=False)
+                self.__plate_ids.pop(evicted.plate_number, None)
+        return vehicle
+
+    def __invalidate(self, vehicle_id=None, plate_number=None):
+        """
+        Evict a vehicle that was just written, and again when the enclosing transaction commits:
+        until the commit other threads still read, and could cache, the previous row
+        """
+        self.__forget(vehicle_id, plate_number)
+        self.__db.after_transaction(lambda: self.__forget(vehicle_id, plate_number))
+
+    def __forget(self, vehicle_id=None, plate_number=None):
+        """Evict a vehicle by id or plate after it was written"""
+        with self.__cache_lock:
+            self.__generation += 1
+            if plate_number is not None:
+                vehicle_id = self.__plate_ids.get(plate_number)
+            vehicle = self.__cache.pop(vehicle_id, None)
+            if vehicle is not None:
+                self.__plate_ids.pop(vehicle.plate_number, None)
         
 
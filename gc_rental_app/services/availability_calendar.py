@@ -0,0 +1,68 @@
+"""Availability Calendar"""
+
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+from repositories.entities.vehicle import Vehicle
+
+# NumPy is only loaded once a calendar is actually built
+if TYPE_CHECKING:
+    import numpy as np
+
+class AvailabilityCalendar:
+    """
+    Vehicle x day occupancy matrix for a date window.
+    occupancy[i, j] is True when vehicles[i] has an active booking on start_date + j days.
+    """
+
+    def __init__(self, vehicles: list[Vehicle], start_date: date, occupancy: "np.ndarray"):
+        self.__vehicles = vehicles
+        self.__start_date = start_date
+        self.__occupancy = occupancy
+
+    @property
+    def vehicles(self) -> list[Vehicle]:
+        return self.__vehicles
+
+    @property
+    def start_date(self) -> date:
+        return self.__start_date
+
+    @property
+    def occupancy(self) -> "np.ndarray":
+        return self.__occupancy
+
+    @property
+    def days(self) -> list[date]:
+        """Dates covered by the matrix columns"""
+        return [self.__start_date + timedelta(days=i) for i in range(self.__occupancy.shape[1])]
+
+    @classmethod
+    def build(cls, vehicles: list[Vehicle], start_date: date, days: int, bookings) -> 'AvailabilityCalendar':
+        """
+        Build the matrix from (vehicle id, start date, end date) booking rows.
+        Every booking adds +1 at its first day and -1 after its last day,
+        a cumulative sum along the day axis then gives the occupancy without per day loops.
+        """
+        import numpy as np
+
+        rows_by_vehicle = {v.vehicle_id: i for i, v in enumerate(vehicles)}
+        diff = np.zeros((len(vehicles), days + 1), dtype=np.int32)
+
+        rows, firsts, lasts = [], [], []
+        for vehicle_id, booking_start, booking_end in bookings:
+            row = rows_by_vehicle.get(vehicle_id)
+            if row is None:
+                continue
+            rows.append(row)
+            firsts.append((booking_start - start_date).days)
+            lasts.append((booking_end - start_date).days)
+
+        if rows:
+            rows = np.asarray(rows)
+            firsts = np.clip(np.asarray(firsts), 0, days)
+            lasts = np.clip(np.asarray(lasts) + 1, 0, days)
+            np.add.at(diff, (rows, firsts), 1)
+            np.add.at(diff, (rows, lasts), -1)
+
+        occupancy = np.cumsum(diff[:, :days], axis=1) > 0
+        return cls(vehicles, start_date, occupancy)
@@ -0,0 +1,135 @@
+"""Availability Index"""
+
+import logging
+import threading
+from bisect import bisect_right
+from datetime import date
+from repositories.bookings_repository import BookingsRepository
+
+logger = logging.getLogger(__name__)
+
+class _VehicleIntervals:
+    """Active bookings of one vehicle sorted by start date"""
+
+    def __init__(self):
+        self.starts: list[date] = []
+        self.ends: list[date] = []
+        self.booking_ids: list[int] = []
+        # max_ends[i] is the latest end date among the first i + 1 bookings
+        self.max_ends: list[date] = []
+
+    def insert(self, booking_id: int, start: date, end: date):
+        """Insert a booking keeping the lists ordered by start date, a booking already indexed is skipped"""
+        if booking_id in self.booking_ids:
+            return
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.booking_ids.insert(position, booking_id)
+        self.max_ends.insert(position, end)
+        self.__refresh_max_ends(position)
+
+    def append(self, booking_id: int, start: date, end: date):
+        """Add a booking starting no earlier than the last one in O(1), falls back to insert otherwise"""
+        if self.starts and start < self.starts[-1]:
+            self.insert(booking_id, start, end)
+            return
+        self.starts.append(start)
+        self.ends.append(end)
+        self.booking_ids.append(booking_id)
+        self.max_ends.append(max(self.max_ends[-1], end) if self.max_ends else end)
+
+    def remove(self, booking_id: int) -> bool:
+        """Remove a booking, returns False when it was not indexed"""
+        try:
+            position = self.booking_ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position]
+        del self.ends[position]
+        del self.booking_ids[position]
+        del self.max_ends[position]
+        self.__refresh_max_ends(position)
+        return True
+
+    def overlaps(self, start: date, end: date) -> bool:
+        """True when any booking intersects [start, end], O(log B)"""
+        # Bookings starting after the requested end can never overlap
+        last = bisect_right(self.starts, end) - 1
+        return last >= 0 and self.max_ends[last] >= start
+
+    def __refresh_max_ends(self, position: int):
+        running = self.max_ends[position - 1] if position > 0 else None
+        for i in range(position, len(self.ends)):
+            if running is None or self.ends[i] > running:
+                running = self.ends[i]
+            self.max_ends[i] = running
+
+class AvailabilityIndex:
+    """
+    In memory interval index over active (pending and approved) bookings.
+    Answers "is this vehicle free for [start, end]" with one binary search per vehicle,
+    so a fleet wide search is O(V log B). The index is loaded lazily from the booking table
+    and kept in sync by BookingService when bookings are added, rejected or completed.
+    """
+
+    def __init__(self, booking_repository: BookingsRepository):
+        self.__booking_repository = booking_repository
+        self.__lock = threading.RLock()
+        self.__vehicles: dict[int, _VehicleIntervals] | None = None
+
+    def rebuild(self):
+        """
+        (Re)load every active booking from the repository.
+        The lock is held while reading, so add() and remove() calls for bookings committed meanwhile
+        apply to the new index instead of a discarded one.
+        """
+        vehicles: dict[int, _VehicleIntervals] = {}
+        count = 0
+        with self.__lock:
+            # Rows arrive ordered by vehicle and start date, so each list is built by appending
+            for booking_id, vehicle_id, start, end in self.__booking_repository.get_active_intervals():
+                vehicles.setdefault(vehicle_id, _VehicleIntervals()).append(booking_id, start, end)
+                count += 1
+            self.__vehicles = vehicles
+        logger.info("Availability index built with %s active bookings", count)
+
+    def add(self, vehicle_id: int, booking_id: int, start_date: date, end_date: date):
+        """Register a new active booking, a no-op when a rebuild already picked it up"""
+        with self.__lock:
+            if self.__vehicles is None:
+                return
+            self.__vehicles.setdefault(vehicle_id, _VehicleIntervals()).insert(booking_id, start_date, end_date)
+
+    def remove(self, vehicle_id: int, booking_id: int):
+        """Forget a booking that no longer blocks the vehicle"""
+        with self.__lock:
+            if self.__vehicles is None:
+                return
+            intervals = self.__vehicles.get(vehicle_id)
+            if intervals is None or not intervals.remove(booking_id):
+                logger.warning(
+                    "Booking %s of vehicle %s was not in the availability index", booking_id, vehicle_id
+                )
+
+    def is_booked(self, vehicle_id: int, start_date: date, end_date: date) -> bool:
+        """True when the vehicle has an active booking overlapping the period"""
+        with self.__lock:
+            intervals = self.__ensure_loaded().get(vehicle_id)
+            if intervals is None:
+                return False
+            return intervals.overlaps(start_date, end_date)
+
+    def free_vehicle_ids(self, vehicle_ids, start_date: date, end_date: date) -> list[int]:
+        """Filter the given vehicle ids down to the ones free for the whole period"""
+        with self.__lock:
+            vehicles = self.__ensure_loaded()
+            return [
+                vehicle_id for vehicle_id in vehicle_ids
+                if vehicle_id not in vehicles or not vehicles[vehicle_id].overlaps(start_date, end_date)
+            ]
+
+    def __ensure_loaded(self) -> dict[int, _VehicleIntervals]:
+        if self.__vehicles is None:
+            self.rebuild()
+        return self.__vehicles
@@ -1,40 +1,152 @@
 """BookingAnalythicsService"""
 
 import logging
+import sqlite3
+import threading
+from bisect import bisect_left, insort
 from datetime import datetime, timedelta, date
-import pandas as pd
+from typing import TYPE_CHECKING
 from repositories.bookings_repository import BookingsRepository
+from configs.app_constants import BookingStatus, ANALYTICS_ENGINE, ANALYTICS_CHUNK_SIZE
+
+# pandas and NumPy are imported inside the methods that need them, so starting the app,
+# logging in and single price quotes do not pay for loading the analytics stack
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+STATUS_CATEGORIES = [status.value for status in BookingStatus]
+FRAME_COLUMNS = ("id", "user_id", "vehicle_id", "start_date", "end_date", "status", "total_cost")
+INTERVAL_FIELDS = [("vehicle_id", "int64"), ("start", "int64"), ("end", "int64")]
+# (minimum bookings in the demand window, price multiplier), highest tier first
+DEMAND_TIERS = ((5, 1.2), (3, 1.1))
+
 class BookingAnalyticsService:
     """This class suppose to process booking data using pandas"""
 
     def __init__(self, booking_repository: BookingsRepository):
         self._booking_repository = booking_repository
+        # Sorted booking start dates per vehicle, loaded lazily and kept current by record_booking
+        self.__start_dates: dict[int, list[date]] | None = None
+        self.__start_dates_lock = threading.Lock()
+        # Flattened demand index, sorted (vehicle_id << 32 | day ordinal) keys for bulk lookups
+        self.__demand_keys: np.ndarray | None = None
+        # Last booking frame and the change counters it reflects
+        self.__snapshot_frame: pd.DataFrame | None = None
+        self.__snapshot_version = 0
+        self.__snapshot_rebuilds = 0
+        self.__snapshot_lock = threading.Lock()
+
+    def record_booking(self, vehicle_id: int, start_date):
+        """Add a newly created booking to the demand index"""
+        with self.__start_dates_lock:
+            if self.__start_dates is None:
+                return
+            start = self.__as_date(start_date)
+            insort(self.__start_dates.setdefault(vehicle_id, []), start)
+            if self.__demand_keys is not None:
+                # NumPy is already loaded once the key array exists, one memmove instead of a rebuild
+                import numpy as np
+
+                key = vehicle_id << 32 | start.toordinal()
+                position = np.searchsorted(self.__demand_keys, key)
+                self.__demand_keys = np.insert(self.__demand_keys, position, key)
+
+    def __load_start_dates(self) -> dict[int, list[date]]:
+        """Build the demand index, rows arrive already sorted by vehicle and start date"""
+        if self.__start_dates is None:
+            start_dates: dict[int, list[date]] = {}
+            for vehicle_id, start_date in self._booking_repository.iter_start_dates():
+                start_dates.setdefault(vehicle_id, []).append(start_date)
+            self.__start_dates = start_dates
+        return self.__start_dates
+
+    def __load_demand_keys(self) -> "np.ndarray":
+        """Flatten the demand index into one sorted key array, record_booking keeps it current"""
+        import numpy as np
+
+        if self.__demand_keys is None:
+            start_dates = self.__load_start_dates()
+            self.__demand_keys = np.fromiter(
+                (
+                    vehicle_id << 32 | start.toordinal()
+                    for vehicle_id in sorted(start_dates)
+                    for start in start_dates[vehicle_id]
+                ),
+                dtype=np.int64
+            )
+        return self.__demand_keys
+
+    @staticmethod
+    def __as_date(value) -> date:
+        return value.date() if isinstance(value, datetime) else value
 
     def _build_dataframe(self):
-        # Load all booking records in the table
-        bookings = self._booking_repository.get_all()
-
-        # Define the data frame to be used within the analytics service
-        df = pd.DataFrame([{
-            "user_id": b.user_id,
-            "vehicle_id": b.vehicle_id,
-            "start_date": b.start_date,
-            "end_date": b.end_date,
-            "total_cost": b.total_cost,
-            "status": b.status
-        } for b in bookings])
-
-        if not df.empty:
-            df["start_date"] = pd.to_datetime(df["start_date"])
-            df["month"] = df["start_date"].dt.to_period("M")
+        """
+        Return the booking frame indexed by booking id.
+        The last frame is cached together with the booking change counters, unchanged tables
+        reuse it as is and inserts/updates made through the booking repository are patched in
+        by re-reading only the changed rows. Deletes and user/vehicle removals are rare and
+        trigger a full rebuild.
+        """
+        import pandas as pd
+
+        with self.__snapshot_lock:
+            # Read counters before rows so changes racing with the load are picked up next time
+            version, rebuilds = self._booking_repository.get_change_versions()
+            frame = self.__snapshot_frame
+
+            if frame is None or rebuilds != self.__snapshot_rebuilds:
+                # Stream booking records so only the frame itself is held in memory
+                frame = self._frame_from_rows(self._booking_repository.iter_booking_rows())
+                logger.debug("Booking snapshot built with %s rows", len(frame))
+            elif version != self.__snapshot_version:
+                changes = self._frame_from_rows(
+                    self._booking_repository.iter_booking_rows(changed_since=self.__snapshot_version)
+                )
+                frame = pd.concat([frame.drop(index=changes.index, errors="ignore"), changes]).sort_index()
+                logger.debug("Booking snapshot patched with %s changed rows", len(changes))
+
+            self.__snapshot_frame = frame
+            self.__snapshot_version = version
+            self.__snapshot_rebuilds = rebuilds
+            return frame
+
+    @staticmethod
+    def _frame_from_rows(rows):
+        """
+        Build the booking frame column by column from raw cursor tuples.
+        Each column is converted once into a typed array (ISO dates are parsed by NumPy),
+        no per row dicts or Python objects are created.
+        """
+        import numpy as np
+        import pandas as pd
+
+        rows = list(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(FRAME_COLUMNS)
+        ids, user_ids, vehicle_ids, start_dates, end_dates, statuses, total_costs = columns
+
+        start = np.array(start_dates, dtype="datetime64[D]")
+        df = pd.DataFrame(
+            {
+                "user_id": pd.array(user_ids, dtype="Int32"),
+                "vehicle_id": pd.array(vehicle_ids, dtype="Int32"),
+                "start_date": start,
+                "end_date": np.array(end_dates, dtype="datetime64[D]"),
+                "total_cost": np.array(total_costs, dtype="float64"),
+                "status": pd.Categorical(statuses, categories=STATUS_CATEGORIES),
+            },
+            # Booking ids fit in int32 like the user and vehicle ids, NumPy raises if one ever does not
+            index=pd.Index(np.array(ids, dtype="int32"), name="id")
+        )
+        df["month"] = df["start_date"].dt.to_period("M")
 
         return df
 
     def calculate_demand_factor(self,
-                                vehicle_id: str,
+                                vehicle_id: int,
                                 start_date: date,
                                 window_days: int = 30
                                 ) -> float:
@@ -44,47 +156,221 @@ class BookingAnalyticsService:
         Higher booking period will increase the pricing multiplier dynamically
         """
         try:
-            df = self._build_dataframe()
-            if df.empty:
-                return 1.0
-            
-            # Ensure new_start_date is datetime
-            if isinstance(start_date, datetime):
-                booking_start = start_date
-            else:
-                booking_start = datetime.combine(start_date, datetime.min.time())
-            
+            booking_start = self.__as_date(start_date)
+
             # Define demand window (default last 7 days)
             delta = timedelta(days=window_days)
             window_start = booking_start - delta
             window_end = booking_start + delta
 
-            recent_bookings = df[
-                (df["vehicle_id"] == vehicle_id) &
-                (df["start_date"] >= window_start) &
-                (df["start_date"] < window_end)
-            ]
-
-            count = len(recent_bookings)
+            # Two binary searches over the vehicle's sorted start dates
+            with self.__start_dates_lock:
+                starts = self.__load_start_dates().get(vehicle_id, [])
+                count = bisect_left(starts, window_end) - bisect_left(starts, window_start)
 
-            if count >= 5:
-                return 1.2
-            elif count >= 3:
-                return 1.1
-            else:
-                return 1.0
+            for threshold, factor in DEMAND_TIERS:
+                if count >= threshold:
+                    return factor
+            return 1.0
         except Exception as e:
             logger.exception("Unexpected error occurred calculating demand factor. %s", e)
 
-    def get_monthly_revenue(self):
-        """Generate monthly revenue report"""
+    def calculate_demand_factors(self,
+                                 vehicle_ids,
+                                 start_date: date,
+                                 window_days: int = 30
+                                 ) -> "np.ndarray":
+        """
+        Vectorized calculate_demand_factor for many vehicles at once.
+        Window counts come from two searchsorted calls over the flattened demand index,
+        returns one multiplier per vehicle id in the given order.
+        """
+        import numpy as np
+
+        booking_start = self.__as_date(start_date)
+        delta = timedelta(days=window_days)
+        window_start = (booking_start - delta).toordinal()
+        window_end = (booking_start + delta).toordinal()
+
+        with self.__start_dates_lock:
+            keys = self.__load_demand_keys()
+        vehicle_keys = np.asarray(vehicle_ids, dtype=np.int64) << 32
+        counts = (
+            np.searchsorted(keys, vehicle_keys | window_end, side="left")
+            - np.searchsorted(keys, vehicle_keys | window_start, side="left")
+        )
+
+        return np.select(
+            [counts >= threshold for threshold, _ in DEMAND_TIERS],
+            [factor for _, factor in DEMAND_TIERS],
+            default=1.0
+        )
+
+    def get_monthly_revenue(self, engine: str = ANALYTICS_ENGINE):
+        """
+        Generate monthly revenue report.
+        engine "summary" reads the trigger maintained revenue_monthly table,
+        "sql" pushes the filter and grouping into the database,
+        "pandas" builds the booking frame and aggregates it in memory,
+        "chunked" aggregates bounded frame chunks and merges the partial sums.
+        An unknown engine raises ValueError, database errors and a missing pandas/NumPy
+        install are logged and give no report (None).
+        """
+        reports = {
+            "summary": self.__monthly_revenue_summary,
+            "sql": self.__monthly_revenue_sql,
+            "pandas": self.__monthly_revenue_pandas,
+            "chunked": self.__monthly_revenue_chunked,
+        }
+        if engine not in reports:
+            raise ValueError(f"Unknown analytics engine: {engine}")
         try:
-            df = self._build_dataframe()
-            df = df[df["status"] == "completed"]
-            revenue = df.groupby("month")["total_cost"].sum().sort_index(ascending=True)
-            rows = [[str(month), f"{amount:.2f}"]
-                for month, amount in revenue.items()
-                ]
-            return rows
-        except Exception as e:
-            logger.exception("Unexpected error occurred while generating monthly revenue. %s", e)
\ No newline at end of file
+            return reports[engine]()
+        except (sqlite3.Error, ImportError) as e:
+            logger.exception("Unexpected error occurred while generating monthly revenue. %s", e)
+            return None
+
+    def __monthly_revenue_pandas(self):
+        df = self._build_dataframe()
+        df = df[df["status"] == "completed"]
+        revenue = df.groupby("month")["total_cost"].sum().sort_index(ascending=True)
+        rows = [[str(month), f"{amount:.2f}"]
+            for month, amount in revenue.items()
+            ]
+        return rows
+
+    def __monthly_revenue_chunked(self):
+        return [[month, f"{amount:.2f}"]
+            for month, amount in sorted(self.monthly_revenue_totals().items())
+            ]
+
+    def monthly_revenue_totals(self, chunk_size: int = ANALYTICS_CHUNK_SIZE, **filters) -> dict[str, float]:
+        """
+        Sum completed booking revenue per month over bounded frame chunks.
+        filters restrict the bookings read (see BookingsRepository.iter_booking_rows), so
+        partial totals of disjoint partitions can be computed separately and added up.
+        """
+        revenue = None
+        for chunk in self._iter_frame_chunks(chunk_size, **filters):
+            completed = chunk[chunk["status"] == "completed"]
+            partial = completed.groupby("month")["total_cost"].sum()
+            revenue = partial if revenue is None else revenue.add(partial, fill_value=0)
+
+        if revenue is None:
+            return {}
+        return {str(month): float(amount) for month, amount in revenue.items()}
+
+    def _iter_frame_chunks(self, chunk_size: int = ANALYTICS_CHUNK_SIZE, **filters):
+        """
+        Yield the booking table as a sequence of typed frames of at most chunk_size rows,
+        peak memory depends on the chunk size instead of the table size
+        """
+        for rows in self._booking_repository.iter_booking_row_chunks(chunk_size, **filters):
+            yield self._frame_from_rows(rows)
+
+    def get_utilization_report(self, vehicles, first_month: date, last_month: date):
+        """
+        Fleet utilization per month between first_month and last_month (inclusive).
+        Approved and completed bookings are expanded into a vehicle x day occupancy grid with NumPy,
+        a day booked twice counts once. Returns (vehicle rows, make rows):
+        vehicle rows are [month, vehicle id, plate, make, occupancy %, idle days, avg booking days],
+        make rows are [month, make, vehicles, occupancy %, idle days, avg booking days].
+        Average booking length counts bookings in the month they start, over their full length.
+        """
+        import numpy as np
+
+        vehicles = sorted(vehicles, key=lambda vehicle: vehicle.vehicle_id)
+        months = np.arange(np.datetime64(first_month, "M"), np.datetime64(last_month, "M") + 1)
+        if not vehicles or len(months) == 0:
+            return [], []
+
+        # Month boundaries as day offsets from the start of the report window
+        bounds = np.append(months, months[-1] + 1).astype("datetime64[D]").astype(np.int64)
+        window_start, window_days = bounds[0], bounds[-1] - bounds[0]
+        month_starts = bounds[:-1] - window_start
+        month_days = np.diff(bounds)
+        n_vehicles, n_months = len(vehicles), len(months)
+
+        fleet_ids = np.array([vehicle.vehicle_id for vehicle in vehicles], dtype=np.int64)
+        intervals = np.fromiter(
+            self._booking_repository.iter_occupancy_intervals(
+                months[0].astype(date), (months[-1] + 1).astype(date) - timedelta(days=1)
+            ),
+            dtype=np.dtype(INTERVAL_FIELDS)
+        )
+        # Drop bookings of vehicles that are not part of the given fleet
+        position = np.minimum(np.searchsorted(fleet_ids, intervals["vehicle_id"]), n_vehicles - 1)
+        in_fleet = fleet_ids[position] == intervals["vehicle_id"]
+        intervals, vehicle_index = intervals[in_fleet], position[in_fleet]
+
+        # Expand every booking clipped to the window into one entry per booked day
+        start = np.maximum(intervals["start"] - window_start, 0)
+        end = np.minimum(intervals["end"] - window_start, window_days - 1)
+        lengths = end - start + 1
+        first_day = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        days = np.repeat(start, lengths) + np.arange(lengths.sum()) - first_day
+        occupied = np.zeros((n_vehicles, window_days), dtype=bool)
+        occupied[np.repeat(vehicle_index, lengths), days] = True
+        booked = np.add.reduceat(occupied, month_starts, axis=1, dtype=np.int64)
+
+        # Booking lengths attributed to the month the booking starts in
+        starts_inside = (intervals["start"] >= window_start) & (intervals["start"] < bounds[-1])
+        start_month = np.searchsorted(
+            month_starts, intervals["start"][starts_inside] - window_start, side="right"
+        ) - 1
+        length_key = vehicle_index[starts_inside] * n_months + start_month
+        full_lengths = (intervals["end"] - intervals["start"] + 1)[starts_inside]
+        booking_count = np.bincount(length_key, minlength=n_vehicles * n_months).reshape(n_vehicles, n_months)
+        booking_days = np.bincount(
+            length_key, weights=full_lengths, minlength=n_vehicles * n_months
+        ).reshape(n_vehicles, n_months)
+
+        makes, make_index = np.unique([vehicle.make for vehicle in vehicles], return_inverse=True)
+        make_vehicles = np.bincount(make_index, minlength=len(makes))
+
+        def per_make(values):
+            totals = np.zeros((len(makes), n_months), dtype=values.dtype)
+            np.add.at(totals, make_index, values)
+            return totals
+
+        make_booked = per_make(booked)
+        make_count = per_make(booking_count)
+        make_days = per_make(booking_days)
+
+        occupancy = booked / month_days * 100
+        make_occupancy = make_booked / (make_vehicles[:, None] * month_days) * 100
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average = np.nan_to_num(booking_days / booking_count)
+            make_average = np.nan_to_num(make_days / make_count)
+
+        labels = [str(month) for month in months]
+        vehicle_rows = [
+            [labels[m], vehicle.vehicle_id, vehicle.plate_number, vehicle.make,
+             f"{occupancy[v, m]:.1f}", int(month_days[m] - booked[v, m]), f"{average[v, m]:.1f}"]
+            for m in range(n_months)
+            for v, vehicle in enumerate(vehicles)
+        ]
+        make_rows = [
+            [labels[m], str(make), int(make_vehicles[k]), f"{make_occupancy[k, m]:.1f}",
+             int(make_vehicles[k] * month_days[m] - make_booked[k, m]), f"{make_average[k, m]:.1f}"]
+            for m in range(n_months)
+            for k, make in enumerate(makes)
+        ]
+        return vehicle_rows, make_rows
+
+    def __monthly_revenue_summary(self):
+        return [
+            [month, f"{amount:.2f}"]
+            for month, amount in self._booking_repository.get_monthly_revenue_summary()
+        ]
+
+    def rebuild_revenue_summary(self):
+        """Repair the revenue summary table by recomputing it from all bookings"""
+        self._booking_repository.rebuild_revenue_summary()
+        logger.info("Revenue summary table rebuilt")
+
+    def __monthly_revenue_sql(self):
+        return [
+            [month, f"{amount:.2f}"]
+            for month, amount in self._booking_repository.get_monthly_revenue(BookingStatus.COMPLETED)
+        ]
@@ -1,16 +1,21 @@
 """Booking Service"""
 
 import logging
-from datetime import date
+from datetime import date, timedelta
 from repositories.entities.user import User
 from repositories.entities.vehicle import Vehicle
 from repositories.entities.booking import Booking
+from repositories.entities.booking_detail import BookingDetail
 from repositories.bookings_repository import BookingsRepository
 from repositories.vehicle_repository import VehicleRepository
-from configs.app_constants import BookingStatus, ANALYTICS_DEMAND_PERIOD
+from database.database_handler import DatabaseHandler
+from configs.app_constants import BookingStatus, ANALYTICS_DEMAND_PERIOD, AVAILABILITY_ENGINE
 from utils.exceptions import BookingNotFound, VehicleAlreadyBooked
 from .authorization_service import AuthorizationService
 from .booking_analytics_service import BookingAnalyticsService
+from .availability_index import AvailabilityIndex
+from .availability_calendar import AvailabilityCalendar
+from .report_executor import ReportExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +25,19 @@ class BookingService:
     def __init__(self,
                  booking_repo: BookingsRepository,
                  vehicle_repo: VehicleRepository,
-                 analytics_service: BookingAnalyticsService
+                 analytics_service: BookingAnalyticsService,
+                 db: DatabaseHandler,
+                 availability_index: AvailabilityIndex | None = None,
+                 availability_engine: str = AVAILABILITY_ENGINE,
+                 report_executor: ReportExecutor | None = None
                  ):
+        self.__db = db
         self.__booking_repo = booking_repo
         self.__vehicle_repo = vehicle_repo
         self.__analytics_service = analytics_service
+        self.__availability_index = availability_index or AvailabilityIndex(booking_repo)
+        self.__availability_engine = availability_engine
+        self.__report_executor = report_executor
 
     def add_booking(self, user: User, booking: Booking):
         """Service method to add a booking"""
@@ -33,17 +46,24 @@ class BookingService:
             # Later this feature can enable this even for admin if require
             AuthorizationService.require_user(user)
 
-            # Check vehicle availability for given period
-            available = self.__check_vehicle_availability(
-                self.__vehicle_repo.get_by_id(booking.vehicle_id),
-                booking.start_date,
-                booking.end_date
-            )
-            if not available:
-                raise VehicleAlreadyBooked("Vehicle not available for the selected dates or rental period.")
+            # Availability check and insert share one transaction
+            with self.__db.transaction():
+                # Check vehicle availability for given period
+                available = self.__check_vehicle_availability(
+                    self.__vehicle_repo.get_by_id(booking.vehicle_id),
+                    booking.start_date,
+                    booking.end_date
+                )
+                if not available:
+                    raise VehicleAlreadyBooked("Vehicle not available for the selected dates or rental period.")
+
+                # Insert booking into DB
+                self.__booking_repo.add(booking)
 
-            # Insert booking into DB
-            self.__booking_repo.add(booking)
+            self.__availability_index.add(
+                booking.vehicle_id, booking.id, booking.start_date, booking.end_date
+            )
+            self.__analytics_service.record_booking(booking.vehicle_id, booking.start_date)
             logger.info(
                 "Booking created: user_id=%s, vehicle_id=%s, booking_id=%s",
                 booking.user_id, booking.vehicle_id, booking.id
@@ -132,19 +152,25 @@ class BookingService:
         try:
             AuthorizationService.require_admin(user)
 
-            booking = self.__booking_repo.get_by_booking_id(booking_id)
-            if not booking:
-                raise BookingNotFound("Booking not found")
+            # Status check and update share one transaction, so two admins cannot both decide
+            with self.__db.transaction():
+                booking = self.__booking_repo.get_by_booking_id(booking_id)
+                if not booking:
+                    raise BookingNotFound("Booking not found")
+
+                if booking.status != BookingStatus.PENDING.value:
+                    raise ValueError(
+                        f"Cannot {status.value} booking with status: {booking.status}"
+                    )
 
-            if booking.status != BookingStatus.PENDING.value:
-                raise ValueError(
-                    f"Cannot {status.value} booking with status: {booking.status}"
+                self.__booking_repo.update_booking_status(
+                    booking_id,
+                    status
                 )
 
-            self.__booking_repo.update_booking_status(
-                booking_id,
-                status
-            )
+            # Rejected bookings no longer block the vehicle
+            if status != BookingStatus.APPROVED:
+                self.__availability_index.remove(booking.vehicle_id, booking_id)
 
         except PermissionError:
             logger.exception(
@@ -181,6 +207,46 @@ class BookingService:
             logger.exception("Failed to retrieve all bookings. %s", e)
             raise
 
+    def get_booking_vehicles(self, bookings: list[Booking]) -> dict[int, Vehicle]:
+        """Vehicles referenced by the given bookings keyed by vehicle id, loaded in one batch"""
+        try:
+            return self.__vehicle_repo.get_by_ids(b.vehicle_id for b in bookings)
+        except Exception as e:
+            logger.exception("Failed to load booking vehicles. %s", e)
+            raise
+
+    def get_booking_details(
+            self,
+            user: User,
+            columns=None,
+            status: BookingStatus | None = None,
+            after_id: int | None = None,
+            before_id: int | None = None,
+            page_size: int | None = None
+        ) -> list[BookingDetail]:
+        """
+        Bookings joined with vehicle and username for admin listings.
+        columns projects only the fields the screen renders, page_size switches to keyset pages.
+        """
+        try:
+            AuthorizationService.require_admin(user)
+
+            return self.__booking_repo.get_booking_details(
+                columns,
+                status=status,
+                page_size=page_size,
+                after_id=after_id,
+                before_id=before_id
+            )
+
+        except PermissionError as e:
+            logger.exception("View booking details failed. %s", e)
+            raise
+
+        except Exception as e:
+            logger.exception("Failed to retrieve booking details. %s", e)
+            raise
+
     def get_booking_by_id(self, user, booking_id) -> Booking:
         """view all bookings"""
         try:
@@ -200,34 +266,39 @@ class BookingService:
         try:
             AuthorizationService.require_admin(admin_user)
 
-            booking = self.__booking_repo.get_by_booking_id(booking_id)
-            if not booking:
-                raise ValueError("Booking not found")
+            # Checks and updates are committed together, a booking cannot be completed twice
+            with self.__db.transaction():
+                booking = self.__booking_repo.get_by_booking_id(booking_id)
+                if not booking:
+                    raise ValueError("Booking not found")
 
-            if booking.status != BookingStatus.APPROVED.value:
-                raise ValueError("Only approved bookings can be completed")
+                if booking.status != BookingStatus.APPROVED.value:
+                    raise ValueError("Only approved bookings can be completed")
 
-            vehicle = self.__vehicle_repo.get_by_id(booking.vehicle_id)
-            if not vehicle:
-                raise ValueError("Vehicle not found")
+                vehicle = self.__vehicle_repo.get_by_id(booking.vehicle_id)
+                if not vehicle:
+                    raise ValueError("Vehicle not found")
 
-            # Mileage validation
-            if new_mileage < vehicle.mileage:
-                raise ValueError("New mileage cannot be less than current mileage - {vehicle.mileage}")
+                # Mileage validation
+                if new_mileage < vehicle.mileage:
+                    raise ValueError("New mileage cannot be less than current mileage - {vehicle.mileage}")
 
-            # Calculate final total
-            final_total = booking.total_cost + additional_charge
+                # Calculate final total, charged in whole cents
+                final_total = round(booking.total_cost + additional_charge, 2)
 
-            # Complete booking
-            booking.total_cost = final_total
-            booking.status = BookingStatus.COMPLETED.value
-            self.__booking_repo.update(booking)
+                # Complete booking
+                booking.total_cost = final_total
+                booking.status = BookingStatus.COMPLETED.value
+                self.__booking_repo.update(booking)
 
-            # Update vehicle mileage
-            self.__vehicle_repo.update_vehicle_mileage(
-                vehicle.vehicle_id,
-                new_mileage
-            )
+                # Update vehicle mileage
+                self.__vehicle_repo.update_vehicle_mileage(
+                    vehicle.vehicle_id,
+                    new_mileage
+                )
+
+            # Returned vehicle is free again
+            self.__availability_index.remove(booking.vehicle_id, booking.id)
 
         except PermissionError as e:
             logger.exception("Complete booking failed: %s", e)
@@ -249,7 +320,26 @@ class BookingService:
 
         final_price = base_price * days * demand_multiplier
 
-        return final_price
+        # Prices are charged and stored in whole cents, total_cost is a DECIMAL(10, 2) column
+        return round(final_price, 2)
+
+    def quote_prices(self, vehicles: list[Vehicle], start_date: date, end_date: date) -> list[float]:
+        """Price every given vehicle for the period in one batch, same result as calculate_price"""
+        import numpy as np
+
+        try:
+            if not vehicles:
+                return []
+            days = (end_date - start_date).days + 1
+            rates = np.array([vehicle.daily_rate for vehicle in vehicles], dtype="float64")
+            factors = self.__analytics_service.calculate_demand_factors(
+                [vehicle.vehicle_id for vehicle in vehicles], start_date, ANALYTICS_DEMAND_PERIOD
+            )
+            # Python's round like calculate_price, np.round can differ on the last cent
+            return [round(price, 2) for price in (rates * days * factors).tolist()]
+        except Exception as e:
+            logger.exception("Quote prices failed: %s", e)
+            raise
     
     def get_monthly_revenue(self, user: User):
         """Calculate Monthly Revenue"""
@@ -269,6 +359,65 @@ class BookingService:
             logger.exception("Complete booking failed: %s", e)
             raise
 
+    def recompute_monthly_revenue(self, user: User, on_progress=None):
+        """
+        Recompute the monthly revenue report from the booking table.
+        Runs in worker processes when a report executor is configured, otherwise in process.
+        on_progress(done, total) is reported per partition, KeyboardInterrupt cancels the report.
+        """
+        try:
+            AuthorizationService.require_admin(user)
+            if self.__report_executor is not None:
+                revenue = self.__report_executor.get_monthly_revenue(on_progress)
+            else:
+                revenue = self.__analytics_service.get_monthly_revenue(engine="chunked")
+            if not revenue:
+                raise ValueError("No valid data found to generate the report!")
+            return revenue
+        except PermissionError as e:
+            logger.exception("Recompute monthly revenue failed: %s", e)
+            raise
+        except ValueError as e:
+            logger.exception("Recompute monthly revenue validation failed: %s", e)
+            raise
+        except KeyboardInterrupt:
+            logger.info("Recompute monthly revenue cancelled by the user")
+            raise
+        except Exception as e:
+            logger.exception("Recompute monthly revenue failed: %s", e)
+            raise
+
+    def get_utilization_report(self, user: User, first_month: date, last_month: date):
+        """Per vehicle and per make monthly occupancy, idle days and average booking length"""
+        try:
+            AuthorizationService.require_admin(user)
+            if first_month > last_month:
+                raise ValueError("First month must not be after the last month")
+            return self.__analytics_service.get_utilization_report(
+                self.__vehicle_repo.iter_all(), first_month, last_month
+            )
+        except PermissionError as e:
+            logger.exception("Utilization report failed: %s", e)
+            raise
+        except ValueError as e:
+            logger.exception("Utilization report validation failed: %s", e)
+            raise
+        except Exception as e:
+            logger.exception("Utilization report failed: %s", e)
+            raise
+
+    def rebuild_revenue_summary(self, user: User):
+        """Recompute the monthly revenue summary from all bookings"""
+        try:
+            AuthorizationService.require_admin(user)
+            self.__analytics_service.rebuild_revenue_summary()
+        except PermissionError as e:
+            logger.exception("Rebuild revenue summary failed: %s", e)
+            raise
+        except Exception as e:
+            logger.exception("Rebuild revenue summary failed: %s", e)
+            raise
+
     def check_vehicle_availability(self, vehicle: Vehicle, start_date: date, end_date: date) -> bool:
         """
         Returns True if vehicle is available for booking given date range
@@ -288,7 +437,11 @@ class BookingService:
                 return False
 
             # Check overlapping bookings
-            if self.__booking_repo.is_vehicle_booked(vehicle.vehicle_id, start_date, end_date):
+            if self.__availability_engine == "index":
+                booked = self.__availability_index.is_booked(vehicle.vehicle_id, start_date, end_date)
+            else:
+                booked = self.__booking_repo.is_vehicle_booked(vehicle.vehicle_id, start_date, end_date)
+            if booked:
                 logger.info("Vehicle %s is already booked and not available for the period from %s to %s.",
                 vehicle.plate_number, start_date, end_date)
                 return False
@@ -310,8 +463,15 @@ class BookingService:
 
             requested_days = (end_date - start_date).days + 1
 
-            # Get available vehicles from repo
-            vehicles = self.__vehicle_repo.get_available_vehicles(start_date, end_date)
+            if self.__availability_engine == "index":
+                vehicles = self.__vehicle_repo.get_all()
+                free_ids = set(self.__availability_index.free_vehicle_ids(
+                    [v.vehicle_id for v in vehicles], start_date, end_date
+                ))
+                vehicles = [v for v in vehicles if v.vehicle_id in free_ids]
+            else:
+                # SQL fallback probing the booking indexes
+                vehicles = self.__booking_repo.get_available_vehicles(start_date, end_date)
 
             # Filter by min/max rent period
             filtered = [
@@ -331,4 +491,89 @@ class BookingService:
                 "Failed to retrieve available vehicles for dates: %s - %s. Error: %s",
                 start_date, end_date, e
             )
-            raise
\ No newline at end of file
+            raise
+
+    def get_availability_calendar(self, start_date: date, days: int) -> AvailabilityCalendar:
+        """Fleet wide vehicle x day occupancy matrix built from one range bounded booking query"""
+        try:
+            if days <= 0:
+                raise ValueError("Calendar must cover at least one day")
+
+            end_date = start_date + timedelta(days=days - 1)
+            vehicles = self.__vehicle_repo.get_all()
+            bookings = self.__booking_repo.get_active_bookings_between(start_date, end_date)
+            return AvailabilityCalendar.build(vehicles, start_date, days, bookings)
+
+        except ValueError as e:
+            logger.exception("Invalid calendar request: %s, %s days. Error: %s", start_date, days, e)
+            raise
+        except Exception as e:
+            logger.exception(
+                "Failed to build availability calendar from %s for %s days. Error: %s",
+                start_date, days, e
+            )
+            raise
+
+    def find_earliest_slots(
+            self,
+            days: int,
+            window_start: date,
+            window_end: date,
+            flexibility: int = 0
+        ) -> list[tuple[Vehicle, date]]:
+        """
+        Earliest start date per vehicle for a rental of the given number of days
+        that fits in [window_start - flexibility, window_end + flexibility], never starting before today.
+        Vehicles whose min/max rent period excludes the length are skipped.
+        Results are ordered by start date.
+        """
+        try:
+            if days <= 0:
+                raise ValueError("Rental must be at least one day")
+            if window_start > window_end:
+                raise ValueError("Start date must be before end date")
+            if flexibility < 0:
+                raise ValueError("Flexibility cannot be negative")
+
+            # Flexibility must not reach into the past, those slots could still be booked
+            search_start = max(date.today(), window_start - timedelta(days=flexibility))
+            search_end = window_end + timedelta(days=flexibility)
+            length = timedelta(days=days - 1)
+            if search_start + length > search_end:
+                raise ValueError("Rental does not fit in the selected window")
+
+            vehicles = [
+                v for v in self.__vehicle_repo.get_all()
+                if v.min_rent_period <= days <= v.max_rent_period
+            ]
+
+            # One range query, then a gap scan over each vehicle's bookings sorted by start
+            intervals: dict[int, list[tuple[date, date]]] = {}
+            for vehicle_id, start, end in self.__booking_repo.get_active_bookings_between(search_start, search_end):
+                intervals.setdefault(vehicle_id, []).append((start, end))
+
+            slots = []
+            for vehicle in vehicles:
+                candidate = search_start
+                for booked_start, booked_end in sorted(intervals.get(vehicle.vehicle_id, [])):
+                    if candidate + length < booked_start:
+                        break
+                    candidate = max(candidate, booked_end + timedelta(days=1))
+                if candidate + length <= search_end:
+                    slots.append((vehicle, candidate))
+
+            slots.sort(key=lambda slot: (slot[1], slot[0].vehicle_id))
+            return slots
+
+        except ValueError as e:
+            logger.exception(
+                "Invalid flexible search: %s days in %s - %s (+/- %s). Error: %s",
+                days, window_start, window_end, flexibility, e
+            )
+            raise
+        except Exception as e:
+            logger.exception(
+                "Failed to search free slots for %s days in %s - %s. Error: %s",
+                days, window_start, window_end, e
+            )
+            raise
@@ -0,0 +1,105 @@
+"""Report Executor"""
+
+import logging
+import signal
+from collections.abc import Callable
+from database.sqlite_read_only_db_handler import SQLiteReadOnlyDBHandler
+from repositories.bookings_repository import BookingsRepository
+from services.booking_analytics_service import BookingAnalyticsService
+from configs.app_constants import ANALYTICS_WORKERS, ANALYTICS_PARTITION_BY
+
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    """Ctrl+C is handled by the CUI process, workers must not die half way through a partition"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _monthly_revenue_partition(db_path: str, filters: dict) -> dict[str, float]:
+    """Worker job: monthly revenue totals of one partition, read through a read-only connection"""
+    analytics_service = BookingAnalyticsService(BookingsRepository(SQLiteReadOnlyDBHandler(db_path)))
+    return analytics_service.monthly_revenue_totals(**filters)
+
+class ReportExecutor:
+    """
+    Runs heavy BookingAnalyticsService reports in a pool of worker processes.
+    The booking table is split into partitions (by start year or by vehicle id range),
+    each worker aggregates its partition against its own read-only connection and
+    the partial results are merged here.
+    """
+
+    def __init__(
+            self,
+            db_path: str,
+            booking_repository: BookingsRepository,
+            max_workers: int = ANALYTICS_WORKERS,
+            partition_by: str = ANALYTICS_PARTITION_BY
+        ):
+        if partition_by not in ("year", "vehicle"):
+            raise ValueError(f"Unknown report partitioning: {partition_by}")
+        self.__db_path = db_path
+        self.__booking_repository = booking_repository
+        self.__max_workers = max(1, max_workers)
+        self.__partition_by = partition_by
+
+    def get_monthly_revenue(self, on_progress: Callable[[int, int], None] | None = None):
+        """
+        Compute the monthly revenue report in parallel.
+        on_progress(done, total) is called each time a partition finishes.
+        KeyboardInterrupt cancels the partitions that have not started yet and is re-raised.
+        """
+        partitions = self.__plan_partitions()
+        totals: dict[str, float] = {}
+        for partial in self.__run(_monthly_revenue_partition, partitions, on_progress):
+            for month, amount in partial.items():
+                totals[month] = totals.get(month, 0.0) + amount
+        return [[month, f"{amount:.2f}"] for month, amount in sorted(totals.items())]
+
+    def __run(self, job, partitions: list[dict], on_progress):
+        """Submit one job per partition and yield the results as they complete"""
+        # Deferred so app start up does not load the multiprocessing machinery
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        if not partitions:
+            return
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.__max_workers, len(partitions)),
+            initializer=_init_worker
+        )
+        futures = [executor.submit(job, self.__db_path, filters) for filters in partitions]
+        logger.info("Report split into %s partitions", len(futures))
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                yield future.result()
+                if on_progress is not None:
+                    on_progress(done, len(futures))
+        except BaseException:
+            # Running partitions finish in the background, queued ones are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.warning("Report cancelled")
+            raise
+        executor.shutdown()
+
+    def __plan_partitions(self) -> list[dict]:
+        """Split the booking table into disjoint filters for BookingsRepository.iter_booking_rows"""
+        bounds = self.__booking_repository.get_partition_bounds()
+        if bounds is None:
+            return []
+        first_start, last_start, low_vehicle, high_vehicle, unassigned = bounds
+
+        if self.__partition_by == "year":
+            return [
+                {"start_date": f"{year:04d}-01-01", "end_date": f"{year:04d}-12-31"}
+                for year in range(int(first_start[:4]), int(last_start[:4]) + 1)
+            ]
+
+        partitions = []
+        if low_vehicle is not None:
+            step = -(-(high_vehicle - low_vehicle + 1) // self.__max_workers)
+            partitions = [
+                {"vehicle_range": (low, min(low + step - 1, high_vehicle))}
+                for low in range(low_vehicle, high_vehicle + 1, step)
+            ]
+        # Deleting a vehicle sets vehicle_id to NULL, no id range covers those bookings
+        if unassigned:
+            partitions.append({"unassigned_vehicle": True})
+        return partitions
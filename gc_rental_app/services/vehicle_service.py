@@ -5,6 +5,7 @@ from datetime import date
 from repositories.vehicle_repository import VehicleRepository
 from repositories.entities.vehicle import Vehicle
 from repositories.entities.user import User
+from configs.app_constants import PAGE_SIZE
 from utils.exceptions import VehicleAlreadyExist, VehicleNotFound
 from .authorization_service import AuthorizationService
 
@@ -92,6 +93,25 @@ class VehicleService:
             logger.error("Remove vehicle failed!. %s", e)
             raise
 
+    def view_vehicles_page(
+            self,
+            user: User,
+            after_id: int | None = None,
+            before_id: int | None = None,
+            page_size: int = PAGE_SIZE
+        ) -> list[Vehicle]:
+        """Service used to view one keyset page of vehicles"""
+        try:
+            AuthorizationService.require_admin(user)
+
+            return self.__vehicle_repo.get_page(page_size, after_id=after_id, before_id=before_id)
+        except PermissionError as e:
+            logger.error("View vehicles page failed!. %s", e)
+            raise
+        except Exception as e:
+            logger.error("View vehicles page failed!. %s", e)
+            raise
+
     def get_vehicle_by_plate(self, plate_number):
         """Service to check the existence of a vehicle"""
 
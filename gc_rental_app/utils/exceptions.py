@@ -35,3 +35,6 @@ class ViolateAllowedRentPeriod(GCRentalException):
 
 class UserNameNotAvailable(GCRentalException):
     """Vehicle Already exist"""
+
+class ConnectionPoolTimeout(GCRentalException):
+    """No database connection available in the pool"""
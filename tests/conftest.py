@@ -0,0 +1,71 @@
+"""Shared pytest fixtures, modules are imported the way main.py sees them"""
+
+import sys
+from pathlib import Path
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent / "gc_rental_app"
+sys.path.insert(0, str(APP_DIR))
+
+# pylint: disable=wrong-import-position
+from configs.app_constants import UserRole
+from database.sqlite_pool_db_handler import SQLitePoolDBHandler
+from database.schema import SchemaHandler
+from repositories.bookings_repository import BookingsRepository
+from repositories.entities.user import User
+from repositories.entities.vehicle import Vehicle
+from repositories.user_repository import UserRepo
+from repositories.vehicle_repository import VehicleRepository
+from services.availability_index import AvailabilityIndex
+from services.booking_analytics_service import BookingAnalyticsService
+from services.bookings_service import BookingService
+
+@pytest.fixture
+def db(tmp_path):
+    """Pooled handler on a fresh, fully migrated database file"""
+    handler = SQLitePoolDBHandler(str(tmp_path / "gc_rental_test.db"))
+    SchemaHandler.initialise(handler)
+    yield handler
+    handler.close()
+
+@pytest.fixture
+def booking_repo(db):
+    return BookingsRepository(db)
+
+@pytest.fixture
+def vehicle_repo(db):
+    return VehicleRepository(db)
+
+@pytest.fixture
+def user_repo(db):
+    return UserRepo(db)
+
+@pytest.fixture
+def customer(user_repo):
+    """A registered user allowed to book"""
+    user_repo.add_user(User("Test Customer", "customer", "secret", "0400000000", UserRole.USER.value))
+    return user_repo.select_user("customer")
+
+@pytest.fixture
+def admin(user_repo):
+    """A registered admin allowed to approve, reject and complete bookings"""
+    user_repo.add_user(User("Test Admin", "admin", "secret", "0400000001", UserRole.ADMIN.value))
+    return user_repo.select_user("admin")
+
+@pytest.fixture
+def fleet_ids(vehicle_repo):
+    """Five vehicles renting for 1 to 14 days, returns their ids"""
+    for i in range(5):
+        vehicle_repo.add(Vehicle(f"FLT{i:03d}", "Toyota", "Corolla", 2020, 1000, 50.0, 1, 14))
+    return [vehicle.vehicle_id for vehicle in vehicle_repo.get_all()]
+
+@pytest.fixture
+def booking_service(db, booking_repo, vehicle_repo):
+    """BookingService wired the way main.py does it, searching vehicles through the interval index"""
+    return BookingService(
+        booking_repo,
+        vehicle_repo,
+        BookingAnalyticsService(booking_repo),
+        db,
+        AvailabilityIndex(booking_repo)
+    )
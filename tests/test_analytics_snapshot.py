@@ -0,0 +1,88 @@
+"""Booking frame snapshot: patched frames must equal a fresh build after every kind of write"""
+
+from datetime import date, timedelta
+import pytest
+from configs.app_constants import BookingStatus
+from repositories.entities.booking import Booking
+from services.booking_analytics_service import BookingAnalyticsService
+
+pd = pytest.importorskip("pandas")
+
+FIRST_DAY = date(2030, 1, 1)
+
+@pytest.fixture
+def analytics(booking_repo):
+    return BookingAnalyticsService(booking_repo)
+
+@pytest.fixture
+def book(booking_repo, customer, fleet_ids):
+    def add(offset, vehicle_index=0, status="pending", total_cost=100.0):
+        start = FIRST_DAY + timedelta(days=offset)
+        booking = Booking(customer.user_id, fleet_ids[vehicle_index], start, start + timedelta(days=2),
+                          status, total_cost)
+        return booking_repo.add(booking)
+    return add
+
+def _assert_fresh(analytics, booking_repo):
+    fresh = analytics._frame_from_rows(booking_repo.iter_booking_rows())
+    pd.testing.assert_frame_equal(analytics._build_dataframe(), fresh)
+
+def test_unchanged_table_reuses_the_frame(analytics, booking_repo, book):
+    book(0)
+    frame = analytics._build_dataframe()
+    assert analytics._build_dataframe() is frame
+
+def test_inserts_and_updates_are_patched_in(analytics, booking_repo, book, fleet_ids):
+    bookings = [book(offset, offset % len(fleet_ids)) for offset in range(0, 40, 4)]
+    _assert_fresh(analytics, booking_repo)
+
+    booking_repo.update_booking_status(bookings[0].id, BookingStatus.APPROVED)
+    _assert_fresh(analytics, booking_repo)
+
+    bookings[1].status = BookingStatus.COMPLETED.value
+    bookings[1].total_cost = 345.5
+    booking_repo.update(bookings[1])
+    book(100, status="approved", total_cost=80.0)
+    _assert_fresh(analytics, booking_repo)
+
+    # Only the written rows are read back
+    version, _ = booking_repo.get_change_versions()
+    booking_repo.update_booking_status(bookings[2].id, BookingStatus.REJECTED)
+    assert [row[0] for row in booking_repo.iter_booking_rows(changed_since=version)] == [bookings[2].id]
+    _assert_fresh(analytics, booking_repo)
+
+def test_rolled_back_write_is_not_logged(db, analytics, booking_repo, book):
+    book(0)
+    frame = analytics._build_dataframe()
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            book(10)
+            raise RuntimeError()
+    assert analytics._build_dataframe() is frame
+    _assert_fresh(analytics, booking_repo)
+
+def test_delete_rebuilds(db, analytics, booking_repo, book):
+    first = book(0)
+    book(10)
+    analytics._build_dataframe()
+    db.execute("DELETE FROM booking WHERE id = ?", (first.id,))
+    _assert_fresh(analytics, booking_repo)
+
+def test_removed_vehicle_rebuilds(analytics, booking_repo, vehicle_repo, book, fleet_ids):
+    book(0, vehicle_index=0)
+    book(10, vehicle_index=1)
+    analytics._build_dataframe()
+    # ON DELETE SET NULL clears vehicle_id without going through BookingsRepository
+    vehicle_repo.remove(fleet_ids[0])
+    frame = analytics._build_dataframe()
+    assert frame["vehicle_id"].isna().sum() == 1
+    _assert_fresh(analytics, booking_repo)
+
+def test_status_and_cost_updates_leave_the_rebuild_counter(booking_repo, book):
+    booking = book(0)
+    _, rebuilds = booking_repo.get_change_versions()
+    booking_repo.update_booking_status(booking.id, BookingStatus.APPROVED)
+    booking.total_cost = 120.0
+    booking_repo.update(booking)
+    book(10)
+    assert booking_repo.get_change_versions()[1] == rebuilds
@@ -0,0 +1,107 @@
+"""Interval availability index kept in sync with bookings, compared against the SQL search"""
+
+import random
+from datetime import date, timedelta
+import pytest
+from configs.app_constants import BookingStatus
+from repositories.entities.booking import Booking
+from services.availability_index import AvailabilityIndex, _VehicleIntervals
+from services.booking_analytics_service import BookingAnalyticsService
+from services.bookings_service import BookingService
+from utils.exceptions import VehicleAlreadyBooked
+
+FIRST_DAY = date(2030, 1, 1)
+DAYS = 60
+
+@pytest.fixture
+def sql_service(db, booking_repo, vehicle_repo):
+    """Same data as booking_service, searching with the SQL availability query"""
+    return BookingService(
+        booking_repo, vehicle_repo, BookingAnalyticsService(booking_repo), db, availability_engine="sql"
+    )
+
+def _random_period(rnd):
+    start = FIRST_DAY + timedelta(days=rnd.randrange(DAYS))
+    return start, start + timedelta(days=rnd.randrange(7))
+
+def _booking_ids(booking_repo, status):
+    return [booking.id for booking in booking_repo.get_bookings_by_status(status)]
+
+def _available_ids(service, start, end):
+    return sorted(vehicle.vehicle_id for vehicle in service.list_available_vehicles(start, end))
+
+def _assert_same_availability(booking_service, sql_service, rnd):
+    for _ in range(10):
+        start, end = _random_period(rnd)
+        assert _available_ids(booking_service, start, end) == _available_ids(sql_service, start, end)
+
+def test_duplicate_insert_is_ignored():
+    intervals = _VehicleIntervals()
+    intervals.insert(1, FIRST_DAY, FIRST_DAY + timedelta(days=3))
+    intervals.insert(1, FIRST_DAY, FIRST_DAY + timedelta(days=3))
+    assert intervals.booking_ids == [1]
+    assert intervals.remove(1)
+    assert not intervals.overlaps(FIRST_DAY, FIRST_DAY + timedelta(days=3))
+
+@pytest.mark.parametrize("seed", range(3))
+def test_add_reject_complete_keep_index_in_sync(
+        booking_service, sql_service, booking_repo, customer, admin, fleet_ids, seed):
+    rnd = random.Random(seed)
+    # Load the index up front so every later change goes through add() and remove()
+    _assert_same_availability(booking_service, sql_service, rnd)
+
+    for _ in range(60):
+        action = rnd.random()
+        pending = _booking_ids(booking_repo, BookingStatus.PENDING)
+        approved = _booking_ids(booking_repo, BookingStatus.APPROVED)
+        if action < 0.5 or not (pending or approved):
+            start, end = _random_period(rnd)
+            booking = Booking(customer.user_id, rnd.choice(fleet_ids), start, end, total_cost=100.0)
+            try:
+                booking_service.add_booking(customer, booking)
+            except VehicleAlreadyBooked:
+                pass
+        elif action < 0.7 and pending:
+            booking_service.approve_booking(admin, rnd.choice(pending))
+        elif action < 0.85 and pending:
+            booking_service.reject_booking(admin, rnd.choice(pending))
+        elif approved:
+            booking_service.complete_booking(admin, rnd.choice(approved), 5000, 0)
+        _assert_same_availability(booking_service, sql_service, rnd)
+
+def test_add_after_a_rebuild_picked_the_booking_up(booking_repo, customer, fleet_ids):
+    index = AvailabilityIndex(booking_repo)
+    vehicle_id = fleet_ids[0]
+    start, end = FIRST_DAY, FIRST_DAY + timedelta(days=2)
+    assert index.free_vehicle_ids([vehicle_id], start, end) == [vehicle_id]
+
+    # The booking commits, a concurrent rebuild loads it, then add_booking's own add() arrives
+    booking = Booking(customer.user_id, vehicle_id, start, end, total_cost=100.0)
+    booking_repo.add(booking)
+    index.rebuild()
+    index.add(vehicle_id, booking.id, start, end)
+    assert index.free_vehicle_ids([vehicle_id], start, end) == []
+
+    # One remove must free the vehicle again, no second copy may linger
+    index.remove(vehicle_id, booking.id)
+    assert index.free_vehicle_ids([vehicle_id], start, end) == [vehicle_id]
+
+@pytest.mark.parametrize("seed", range(3))
+def test_check_vehicle_availability_matches_sql(
+        booking_service, sql_service, vehicle_repo, customer, admin, fleet_ids, seed):
+    rnd = random.Random(seed)
+    for _ in range(40):
+        start, end = _random_period(rnd)
+        try:
+            booking_service.add_booking(
+                customer, Booking(customer.user_id, rnd.choice(fleet_ids), start, end, total_cost=100.0)
+            )
+        except VehicleAlreadyBooked:
+            pass
+
+    vehicles = vehicle_repo.get_all()
+    for _ in range(100):
+        vehicle = rnd.choice(vehicles)
+        start, end = _random_period(rnd)
+        assert (booking_service.check_vehicle_availability(vehicle, start, end)
+                == sql_service.check_vehicle_availability(vehicle, start, end))
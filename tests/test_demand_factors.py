@@ -0,0 +1,116 @@
+"""Demand factor index and its vectorized variant against the original DataFrame filter"""
+
+import random
+from datetime import date, datetime, timedelta
+import pandas as pd
+import pytest
+from repositories.entities.booking import Booking
+from services.booking_analytics_service import BookingAnalyticsService
+
+VEHICLES = 8
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 120
+
+def reference_frame(bookings):
+    """Booking frame the way _build_dataframe built it before the demand index"""
+    df = pd.DataFrame([{"vehicle_id": b.vehicle_id, "start_date": b.start_date} for b in bookings])
+    if not df.empty:
+        df["start_date"] = pd.to_datetime(df["start_date"])
+    return df
+
+def reference_demand_factor(df, vehicle_id, start_date, window_days):
+    """The per quote DataFrame filter calculate_demand_factor used before the demand index"""
+    if df.empty:
+        return 1.0
+    if isinstance(start_date, datetime):
+        booking_start = start_date
+    else:
+        booking_start = datetime.combine(start_date, datetime.min.time())
+    delta = timedelta(days=window_days)
+    window_start = booking_start - delta
+    window_end = booking_start + delta
+
+    count = len(df[
+        (df["vehicle_id"] == vehicle_id) &
+        (df["start_date"] >= window_start) &
+        (df["start_date"] < window_end)
+    ])
+    if count >= 5:
+        return 1.2
+    if count >= 3:
+        return 1.1
+    return 1.0
+
+def _random_booking(rnd):
+    start = FIRST_DAY + timedelta(days=rnd.randrange(DAYS))
+    return Booking(
+        user_id=1,
+        vehicle_id=rnd.randrange(1, VEHICLES + 1),
+        start_date=start,
+        end_date=start + timedelta(days=rnd.randrange(5)),
+        status=rnd.choice(("pending", "approved", "completed")),
+        total_cost=100.0
+    )
+
+def _random_quote(rnd):
+    # Vehicle VEHICLES + 1 has no bookings at all
+    vehicle_id = rnd.randrange(1, VEHICLES + 2)
+    start = FIRST_DAY + timedelta(days=rnd.randrange(-20, DAYS + 20))
+    return vehicle_id, start, rnd.choice((0, 3, 7, 30))
+
+@pytest.fixture
+def fleet(db, booking_repo):
+    db.execute("INSERT INTO user (fullname, username, password, mobile, role) VALUES ('u', 'u', 'x', '1', 2)")
+    db.execute_many(
+        """
+        INSERT INTO vehicle (plate_number, make, model, year, mileage, daily_rate, min_rent_period, max_rent_period)
+        VALUES (?, 'Toyota', 'Corolla', 2020, 1000, 50.0, 1, 30)
+        """,
+        [(f"PLT{i:03d}",) for i in range(VEHICLES + 1)]
+    )
+    return booking_repo
+
+@pytest.mark.parametrize("seed", range(5))
+def test_demand_factors_match_dataframe_reference(fleet, seed):
+    rnd = random.Random(seed)
+    for _ in range(rnd.randrange(50, 300)):
+        fleet.add(_random_booking(rnd))
+    analytics = BookingAnalyticsService(fleet)
+    frame = reference_frame(fleet.get_all())
+
+    for _ in range(200):
+        vehicle_id, start, window_days = _random_quote(rnd)
+        expected = reference_demand_factor(frame, vehicle_id, start, window_days)
+        assert analytics.calculate_demand_factor(vehicle_id, start, window_days) == expected
+
+    vehicle_ids = list(range(1, VEHICLES + 2))
+    for _ in range(50):
+        _, start, window_days = _random_quote(rnd)
+        expected = [reference_demand_factor(frame, v, start, window_days) for v in vehicle_ids]
+        assert analytics.calculate_demand_factors(vehicle_ids, start, window_days).tolist() == expected
+
+@pytest.mark.parametrize("seed", range(3))
+def test_recorded_bookings_keep_index_current(fleet, seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        fleet.add(_random_booking(rnd))
+    analytics = BookingAnalyticsService(fleet)
+    vehicle_ids = list(range(1, VEHICLES + 2))
+    # Load both the per vehicle lists and the flattened key array before recording new bookings
+    analytics.calculate_demand_factor(1, FIRST_DAY)
+    analytics.calculate_demand_factors(vehicle_ids, FIRST_DAY)
+
+    for _ in range(60):
+        booking = _random_booking(rnd)
+        fleet.add(booking)
+        analytics.record_booking(booking.vehicle_id, booking.start_date)
+
+    frame = reference_frame(fleet.get_all())
+    for _ in range(30):
+        vehicle_id, start, window_days = _random_quote(rnd)
+        # Quotes may come in with a datetime, as the CUI did originally
+        moment = datetime.combine(start, datetime.min.time())
+        expected = reference_demand_factor(frame, vehicle_id, moment, window_days)
+        assert analytics.calculate_demand_factor(vehicle_id, moment, window_days) == expected
+        expected = [reference_demand_factor(frame, v, start, window_days) for v in vehicle_ids]
+        assert analytics.calculate_demand_factors(vehicle_ids, start, window_days).tolist() == expected
@@ -0,0 +1,101 @@
+"""Earliest free slot search: gap scan per vehicle, rent period limits and window edges"""
+
+from datetime import date, timedelta
+import pytest
+from repositories.entities.booking import Booking
+from repositories.entities.vehicle import Vehicle
+
+DAY = date(2030, 3, 1)
+
+def _day(offset):
+    return DAY + timedelta(days=offset)
+
+@pytest.fixture
+def add_vehicle(vehicle_repo):
+    def add(plate, min_rent_period=1, max_rent_period=14):
+        vehicle_repo.add(Vehicle(plate, "Toyota", "Corolla", 2020, 1000, 50.0, min_rent_period, max_rent_period))
+        return vehicle_repo.get_by_plate(plate).vehicle_id
+    return add
+
+@pytest.fixture
+def book(booking_repo, customer):
+    def add(vehicle_id, first, last, status="approved"):
+        booking_repo.add(Booking(customer.user_id, vehicle_id, _day(first), _day(last), status, 100.0))
+    return add
+
+def _slots(booking_service, days, first, last, flexibility=0):
+    return [
+        (vehicle.plate_number, start)
+        for vehicle, start in booking_service.find_earliest_slots(days, _day(first), _day(last), flexibility)
+    ]
+
+def test_vehicle_without_bookings_starts_at_the_window(booking_service, add_vehicle):
+    add_vehicle("EMPTY")
+    assert _slots(booking_service, 3, 0, 10) == [("EMPTY", _day(0))]
+
+def test_back_to_back_bookings_leave_no_gap(booking_service, add_vehicle, book):
+    vehicle_id = add_vehicle("BUSY")
+    book(vehicle_id, 0, 2)
+    book(vehicle_id, 3, 5)
+    assert _slots(booking_service, 2, 0, 20) == [("BUSY", _day(6))]
+
+def test_gap_of_exactly_the_rental_length_is_used(booking_service, add_vehicle, book):
+    vehicle_id = add_vehicle("GAP")
+    book(vehicle_id, 0, 2)
+    book(vehicle_id, 5, 8)
+    assert _slots(booking_service, 2, 0, 20) == [("GAP", _day(3))]
+    # One day longer no longer fits between the bookings
+    assert _slots(booking_service, 3, 0, 20) == [("GAP", _day(9))]
+
+def test_rejected_and_completed_bookings_do_not_block(booking_service, add_vehicle, book):
+    vehicle_id = add_vehicle("FREE")
+    book(vehicle_id, 0, 4, "rejected")
+    book(vehicle_id, 0, 4, "completed")
+    book(vehicle_id, 6, 8, "pending")
+    assert _slots(booking_service, 3, 0, 20) == [("FREE", _day(0))]
+
+def test_vehicle_without_room_in_the_window_is_left_out(booking_service, add_vehicle, book):
+    full = add_vehicle("FULL")
+    add_vehicle("OPEN")
+    book(full, 0, 10)
+    assert _slots(booking_service, 3, 0, 10) == [("OPEN", _day(0))]
+
+def test_rent_period_limits_filter_vehicles(booking_service, add_vehicle):
+    add_vehicle("SHORT", max_rent_period=3)
+    add_vehicle("LONG", min_rent_period=5)
+    add_vehicle("ANY")
+    # Slots on the same day are ordered by vehicle id
+    assert _slots(booking_service, 3, 0, 10) == [("SHORT", _day(0)), ("ANY", _day(0))]
+    assert _slots(booking_service, 5, 0, 10) == [("LONG", _day(0)), ("ANY", _day(0))]
+    # Both limits are inclusive
+    assert _slots(booking_service, 4, 0, 10) == [("ANY", _day(0))]
+
+def test_flexibility_widens_both_window_edges(booking_service, add_vehicle, book):
+    early = add_vehicle("EARLY")
+    late = add_vehicle("LATE")
+    book(early, 0, 10)
+    book(late, -5, 8)
+    # EARLY only fits before the window, LATE only fits across its end
+    assert _slots(booking_service, 3, 0, 10, flexibility=3) == [("EARLY", _day(-3)), ("LATE", _day(9))]
+    assert _slots(booking_service, 3, 0, 10) == []
+
+def test_rental_longer_than_the_window_is_rejected(booking_service, add_vehicle):
+    add_vehicle("ANY")
+    with pytest.raises(ValueError):
+        _slots(booking_service, 5, 0, 2)
+    assert _slots(booking_service, 5, 0, 2, flexibility=1) == [("ANY", _day(-1))]
+
+def test_flexibility_never_proposes_past_dates(booking_service, add_vehicle):
+    add_vehicle("ANY")
+    today = date.today()
+    slots = booking_service.find_earliest_slots(3, today, today + timedelta(days=5), flexibility=4)
+    assert [start for _, start in slots] == [today]
+
+    # A window that only fits through flexibility before today has no slot left
+    with pytest.raises(ValueError):
+        booking_service.find_earliest_slots(3, today, today, flexibility=1)
+
+@pytest.mark.parametrize("days, first, last, flexibility", [(0, 0, 5, 0), (2, 5, 0, 0), (2, 0, 5, -1)])
+def test_invalid_searches_are_rejected(booking_service, days, first, last, flexibility):
+    with pytest.raises(ValueError):
+        _slots(booking_service, days, first, last, flexibility)
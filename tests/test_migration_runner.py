@@ -0,0 +1,113 @@
+"""Migration runner: versioning, rollback of failed migrations and batched backfills"""
+
+import importlib
+import sqlite3
+import sys
+import textwrap
+import pytest
+from database.migration_runner import MigrationRunner, backfill_in_batches
+from database.sqlite_pool_db_handler import SQLitePoolDBHandler
+
+ORDERS_SCHEMA = """
+VERSION = 1
+
+def upgrade(db):
+    db.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, amount REAL)")
+    db.execute_many("INSERT INTO orders (amount) VALUES (?)", [(i * 1.5,) for i in range(1, 101)])
+"""
+
+# Adds a column and fills it batch by batch outside the runner's transaction
+ORDERS_BACKFILL = """
+from database.migration_runner import backfill_in_batches
+
+VERSION = 2
+TRANSACTIONAL = False
+
+def upgrade(db):
+    columns = {row["name"] for row in db.execute_and_fetch_all("PRAGMA table_info(orders)")}
+    if "amount_cents" not in columns:
+        db.execute("ALTER TABLE orders ADD COLUMN amount_cents INTEGER")
+    backfill_in_batches(
+        db,
+        "orders",
+        "UPDATE orders SET amount_cents = CAST(ROUND(amount * 100) AS INTEGER) WHERE id BETWEEN ? AND ?",
+        batch_size=30
+    )
+"""
+
+BROKEN = """
+VERSION = 3
+
+def upgrade(db):
+    db.execute("CREATE TABLE half_done (id INTEGER PRIMARY KEY)")
+    db.execute("INSERT INTO missing_table VALUES (1)")
+"""
+
+@pytest.fixture
+def migrations_package(tmp_path):
+    """Build a throwaway migrations package, returns a function adding modules to it"""
+    package_dir = tmp_path / "test_migrations"
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("")
+    sys.path.insert(0, str(tmp_path))
+
+    def add(name, source):
+        (package_dir / f"{name}.py").write_text(textwrap.dedent(source))
+        importlib.invalidate_caches()
+        sys.modules.pop("test_migrations", None)
+        return importlib.import_module("test_migrations")
+
+    yield add
+    sys.path.remove(str(tmp_path))
+    for name in [name for name in sys.modules if name.startswith("test_migrations")]:
+        del sys.modules[name]
+
+@pytest.fixture
+def empty_db(tmp_path):
+    handler = SQLitePoolDBHandler(str(tmp_path / "migrations_test.db"))
+    yield handler
+    handler.close()
+
+def test_app_migrations_reach_latest_and_rerun_is_a_no_op(db):
+    runner = MigrationRunner(db)
+    assert runner.current_version() == runner.latest_version
+    assert runner.run() == runner.latest_version
+
+def test_backfill_migration_updates_every_row_in_batches(empty_db, migrations_package):
+    migrations_package("v001_orders", ORDERS_SCHEMA)
+    package = migrations_package("v002_orders_backfill", ORDERS_BACKFILL)
+
+    commits = []
+    empty_db._connect().set_trace_callback(
+        lambda statement: commits.append(statement) if statement.upper().startswith("COMMIT") else None
+    )
+    assert MigrationRunner(empty_db, package).run() == 2
+    empty_db._connect().set_trace_callback(None)
+
+    rows = empty_db.execute_and_fetch_all("SELECT amount, amount_cents FROM orders")
+    assert len(rows) == 100
+    assert all(row["amount_cents"] == round(row["amount"] * 100) for row in rows)
+    # One commit for v001, then one per 30 row batch of ids 1-100 for v002
+    assert len(commits) == 1 + 4
+
+def test_backfill_reports_touched_rows_and_skips_empty_tables(empty_db):
+    empty_db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, flag INTEGER DEFAULT 0)")
+    sql = "UPDATE items SET flag = 1 WHERE id BETWEEN ? AND ?"
+    assert backfill_in_batches(empty_db, "items", sql, batch_size=10) == 0
+
+    empty_db.execute_many("INSERT INTO items (id) VALUES (?)", [(i,) for i in (1, 2, 15, 16, 40)])
+    assert backfill_in_batches(empty_db, "items", sql, batch_size=10) == 5
+    assert empty_db.execute_and_fetch_one("SELECT SUM(flag) FROM items") == 5
+
+def test_failed_migration_is_rolled_back(empty_db, migrations_package):
+    migrations_package("v001_orders", ORDERS_SCHEMA)
+    package = migrations_package("v003_broken", BROKEN)
+
+    runner = MigrationRunner(empty_db, package)
+    with pytest.raises(sqlite3.OperationalError):
+        runner.run()
+
+    # v001 is committed, v003 left neither its table nor its version behind
+    assert runner.current_version() == 1
+    tables = {row["name"] for row in empty_db.execute_and_fetch_all("SELECT name FROM sqlite_master")}
+    assert "orders" in tables and "half_done" not in tables
@@ -0,0 +1,32 @@
+"""Monthly revenue report: every engine agrees, a bad engine name raises, database errors give no report"""
+
+from datetime import date, timedelta
+import pytest
+from repositories.entities.booking import Booking
+from services.booking_analytics_service import BookingAnalyticsService
+
+ENGINES = ["summary", "sql", "pandas", "chunked"]
+
+@pytest.fixture
+def analytics(booking_repo, customer, fleet_ids):
+    statuses = ("completed", "approved", "completed", "rejected", "pending")
+    for i in range(60):
+        start = date(2030, 1, 3) + timedelta(days=i * 5)
+        booking_repo.add(Booking(customer.user_id, fleet_ids[i % len(fleet_ids)], start, start,
+                                 statuses[i % len(statuses)], 80 + i * 1.37))
+    return BookingAnalyticsService(booking_repo)
+
+@pytest.mark.parametrize("engine", ENGINES[1:])
+def test_engines_agree_with_the_summary(analytics, engine):
+    pytest.importorskip("pandas")
+    expected = analytics.get_monthly_revenue(engine="summary")
+    assert expected
+    assert analytics.get_monthly_revenue(engine=engine) == expected
+
+def test_unknown_engine_raises(analytics):
+    with pytest.raises(ValueError, match="Unknown analytics engine"):
+        analytics.get_monthly_revenue(engine="spreadsheet")
+
+def test_database_error_gives_no_report(db, analytics):
+    db.execute("DROP TABLE revenue_monthly")
+    assert analytics.get_monthly_revenue(engine="summary") is None
@@ -0,0 +1,134 @@
+"""Repository lookups must be answered from an index, not by scanning the table"""
+
+from datetime import date, timedelta
+import pytest
+from configs.app_constants import BookingStatus
+from repositories.bookings_repository import BookingsRepository
+from repositories.user_repository import UserRepo
+from repositories.vehicle_repository import VehicleRepository
+
+START = date(2025, 3, 1)
+END = date(2025, 3, 10)
+
+class _PlanRecorder:
+    """DatabaseHandler stand-in that records the query plan of every SELECT before running it"""
+
+    def __init__(self, db):
+        self.__db = db
+        self.plans: list[tuple[str, list[str]]] = []
+
+    def __getattr__(self, name):
+        return getattr(self.__db, name)
+
+    def __explain(self, sql, params):
+        if sql.lstrip().upper().startswith("SELECT"):
+            rows = self.__db.execute_and_fetch_all("EXPLAIN QUERY PLAN " + sql, params)
+            self.plans.append((" ".join(sql.split()), [row["detail"] for row in rows]))
+
+    def execute(self, sql, params=()):
+        self.__explain(sql, params)
+        return self.__db.execute(sql, params)
+
+    def execute_and_fetch_one(self, sql, params=()):
+        self.__explain(sql, params)
+        return self.__db.execute_and_fetch_one(sql, params)
+
+    def execute_and_fetch_all(self, sql, params=()):
+        self.__explain(sql, params)
+        return self.__db.execute_and_fetch_all(sql, params)
+
+    def execute_and_stream(self, sql, params=(), batch_size=None):
+        self.__explain(sql, params)
+        return self.__db.execute_and_stream(sql, params, batch_size)
+
+@pytest.fixture
+def seeded_db(db):
+    """A few hundred bookings with planner statistics, so plans look like production ones"""
+    db.execute_many(
+        "INSERT INTO user (fullname, username, password, mobile, role) VALUES (?, ?, ?, ?, ?)",
+        [(f"Test User {i}", f"test_user_{i}", "x", "0400000000", 2) for i in range(50)]
+    )
+    db.execute_many(
+        """
+        INSERT INTO vehicle (plate_number, make, model, year, mileage, daily_rate, min_rent_period, max_rent_period)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [(f"PLT{i:03d}", "Toyota", "Corolla", 2020, 1000, 50.0, 1, 30) for i in range(20)]
+    )
+    statuses = [status.value for status in BookingStatus]
+    db.execute_many(
+        """
+        INSERT INTO booking (user_id, vehicle_id, start_date, end_date, status, total_cost)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (i % 50 + 1, i % 20 + 1, START + timedelta(days=i % 90), START + timedelta(days=i % 90 + 3),
+             statuses[i % len(statuses)], 150.0)
+            for i in range(400)
+        ]
+    )
+    db.execute("ANALYZE")
+    return db
+
+# (query name, repository call, tables the query may legitimately scan)
+BOOKING_QUERIES = [
+    ("is_vehicle_booked", lambda repo: repo.is_vehicle_booked(3, START, END), ()),
+    ("get_by_user_id", lambda repo: repo.get_by_user_id(1), ()),
+    ("get_bookings_by_status", lambda repo: repo.get_bookings_by_status(BookingStatus.PENDING), ()),
+    ("get_by_booking_id", lambda repo: repo.get_by_booking_id(7), ()),
+    ("get_booking_details", lambda repo: repo.get_booking_details(
+        ("username", "plate_number", "start_date"), status=BookingStatus.PENDING, page_size=10, after_id=5), ()),
+    ("get_active_intervals", lambda repo: repo.get_active_intervals(), ()),
+    ("get_active_bookings_between", lambda repo: repo.get_active_bookings_between(START, END), ()),
+    ("iter_occupancy_intervals", lambda repo: list(repo.iter_occupancy_intervals(START, END)), ()),
+    ("get_monthly_revenue", lambda repo: repo.get_monthly_revenue(BookingStatus.COMPLETED), ()),
+    # Every vehicle is a candidate, only the booking probe per vehicle has to be indexed
+    ("get_available_vehicles", lambda repo: repo.get_available_vehicles(START, END), ("v",)),
+]
+
+VEHICLE_QUERIES = [
+    ("get_by_id", lambda repo: repo.get_by_id(4), ()),
+    ("get_by_plate", lambda repo: repo.get_by_plate("PLT005"), ()),
+    ("get_by_ids", lambda repo: repo.get_by_ids([1, 2, 3]), ()),
+    ("get_page_after", lambda repo: repo.get_page(5, after_id=3), ()),
+]
+
+USER_QUERIES = [
+    ("select_user", lambda repo: repo.select_user("test_user_7"), ()),
+]
+
+def _assert_indexed(recorder, scannable):
+    assert recorder.plans, "the repository call issued no SELECT"
+    for sql, plan in recorder.plans:
+        scans = [
+            detail for detail in plan
+            if detail.startswith("SCAN") and detail.split()[1] not in scannable
+        ]
+        assert not scans, f"{sql}\nplan: {plan}"
+        # An automatic index is built from a full scan on every execution
+        assert not any("AUTOMATIC" in detail for detail in plan), f"{sql}\nplan: {plan}"
+        assert any(detail.startswith("SEARCH") for detail in plan), f"{sql}\nplan: {plan}"
+
+@pytest.mark.parametrize(
+    "call, scannable", [case[1:] for case in BOOKING_QUERIES], ids=[case[0] for case in BOOKING_QUERIES]
+)
+def test_booking_queries_use_an_index(seeded_db, call, scannable):
+    recorder = _PlanRecorder(seeded_db)
+    call(BookingsRepository(recorder))
+    _assert_indexed(recorder, scannable)
+
+@pytest.mark.parametrize(
+    "call, scannable", [case[1:] for case in VEHICLE_QUERIES], ids=[case[0] for case in VEHICLE_QUERIES]
+)
+def test_vehicle_queries_use_an_index(seeded_db, call, scannable):
+    recorder = _PlanRecorder(seeded_db)
+    call(VehicleRepository(recorder))
+    _assert_indexed(recorder, scannable)
+
+@pytest.mark.parametrize(
+    "call, scannable", [case[1:] for case in USER_QUERIES], ids=[case[0] for case in USER_QUERIES]
+)
+def test_user_queries_use_an_index(seeded_db, call, scannable):
+    recorder = _PlanRecorder(seeded_db)
+    call(UserRepo(recorder))
+    _assert_indexed(recorder, scannable)
@@ -0,0 +1,81 @@
+"""Parallel reports: partition planning and merged results against the single process report"""
+
+from datetime import date, timedelta
+import pytest
+from repositories.entities.booking import Booking
+from services.booking_analytics_service import BookingAnalyticsService
+from services.report_executor import ReportExecutor
+
+pytest.importorskip("pandas")
+
+@pytest.fixture
+def book(booking_repo, customer):
+    def add(vehicle_id, start, status="completed", total_cost=100.25):
+        booking_repo.add(Booking(customer.user_id, vehicle_id, start, start + timedelta(days=2), status, total_cost))
+    return add
+
+def _partitions(executor):
+    return executor._ReportExecutor__plan_partitions()
+
+def _assert_disjoint_cover(booking_repo, partitions):
+    """Every booking is read by exactly one partition"""
+    ids = [row[0] for filters in partitions for row in booking_repo.iter_booking_rows(**filters)]
+    assert sorted(ids) == [row[0] for row in booking_repo.iter_booking_rows()]
+
+def test_no_bookings_no_partitions(db, booking_repo):
+    executor = ReportExecutor(db.db_path, booking_repo)
+    assert _partitions(executor) == []
+    assert executor.get_monthly_revenue() == []
+
+def test_year_partitions_cover_every_start_year(db, booking_repo, fleet_ids, book):
+    book(fleet_ids[0], date(2028, 12, 31))
+    book(fleet_ids[1], date(2030, 1, 1))
+    executor = ReportExecutor(db.db_path, booking_repo, partition_by="year")
+    # Years without bookings still get a partition, it just comes back empty
+    assert _partitions(executor) == [
+        {"start_date": f"{year}-01-01", "end_date": f"{year}-12-31"} for year in (2028, 2029, 2030)
+    ]
+    _assert_disjoint_cover(booking_repo, _partitions(executor))
+
+def test_vehicle_partitions_split_the_id_range_per_worker(db, booking_repo, fleet_ids, book):
+    for vehicle_id in fleet_ids:
+        book(vehicle_id, date(2030, 1, 1))
+    low, high = min(fleet_ids), max(fleet_ids)
+    executor = ReportExecutor(db.db_path, booking_repo, max_workers=2, partition_by="vehicle")
+    assert _partitions(executor) == [
+        {"vehicle_range": (low, low + 2)},
+        {"vehicle_range": (low + 3, high)},
+    ]
+    _assert_disjoint_cover(booking_repo, _partitions(executor))
+
+def test_bookings_of_deleted_vehicles_get_their_own_partition(
+        db, booking_repo, vehicle_repo, fleet_ids, book):
+    for vehicle_id in fleet_ids:
+        book(vehicle_id, date(2030, 1, 1))
+    vehicle_repo.remove(fleet_ids[-1])
+    executor = ReportExecutor(db.db_path, booking_repo, max_workers=2, partition_by="vehicle")
+    partitions = _partitions(executor)
+    assert partitions[-1] == {"unassigned_vehicle": True}
+    assert partitions[0]["vehicle_range"][0] == fleet_ids[0]
+    assert partitions[-2]["vehicle_range"][1] == fleet_ids[-2]
+    _assert_disjoint_cover(booking_repo, partitions)
+
+def test_unknown_partitioning_is_rejected(db, booking_repo):
+    with pytest.raises(ValueError):
+        ReportExecutor(db.db_path, booking_repo, partition_by="month")
+
+@pytest.mark.parametrize("partition_by", ["year", "vehicle"])
+def test_merged_report_equals_the_single_process_report(
+        db, booking_repo, vehicle_repo, fleet_ids, book, partition_by):
+    statuses = ("completed", "completed", "approved", "rejected")
+    for i in range(120):
+        book(fleet_ids[i % len(fleet_ids)], date(2028, 11, 1) + timedelta(days=i * 9),
+             statuses[i % len(statuses)], 50 + i * 0.25)
+    vehicle_repo.remove(fleet_ids[2])
+
+    expected = BookingAnalyticsService(booking_repo).get_monthly_revenue(engine="sql")
+    progress = []
+    executor = ReportExecutor(db.db_path, booking_repo, max_workers=3, partition_by=partition_by)
+    assert executor.get_monthly_revenue(on_progress=lambda done, total: progress.append((done, total))) == expected
+    partitions = len(_partitions(executor))
+    assert progress == [(done, partitions) for done in range(1, partitions + 1)]
@@ -0,0 +1,118 @@
+"""revenue_monthly triggers: the summary must follow every booking write like the SQL aggregate"""
+
+from datetime import date
+import pytest
+from configs.app_constants import BookingStatus
+from database.migration_runner import MigrationRunner
+from database.migrations import v001_initial_schema, v002_booking_indexes, v003_revenue_monthly
+from database.sqlite_pool_db_handler import SQLitePoolDBHandler
+from repositories.bookings_repository import BookingsRepository
+from repositories.entities.booking import Booking
+from services.booking_analytics_service import BookingAnalyticsService
+
+MARCH = date(2030, 3, 10)
+APRIL = date(2030, 4, 2)
+
+@pytest.fixture
+def empty_db(tmp_path):
+    handler = SQLitePoolDBHandler(str(tmp_path / "revenue_upgrade_test.db"))
+    yield handler
+    handler.close()
+
+@pytest.fixture
+def book(booking_repo, customer, fleet_ids):
+    def add(start, status="completed", total_cost=100.0):
+        return booking_repo.add(Booking(customer.user_id, fleet_ids[0], start, start, status, total_cost))
+    return add
+
+def _summary(db):
+    return {
+        row["month"]: (row["revenue"], row["bookings"])
+        for row in db.execute_and_fetch_all("SELECT month, revenue, bookings FROM revenue_monthly WHERE bookings > 0")
+    }
+
+def _aggregate(db):
+    return {
+        row["month"]: (row["revenue"], row["bookings"])
+        for row in db.execute_and_fetch_all(
+            """
+            SELECT strftime('%Y-%m', start_date) AS month, TOTAL(total_cost) AS revenue, COUNT(*) AS bookings
+            FROM booking
+            WHERE status = 'completed'
+            GROUP BY month
+            """
+        )
+    }
+
+def _assert_matches_aggregate(db):
+    summary, aggregate = _summary(db), _aggregate(db)
+    assert summary.keys() == aggregate.keys()
+    for month, (revenue, bookings) in aggregate.items():
+        assert summary[month] == (pytest.approx(revenue), bookings)
+
+def test_insert_counts_only_completed_bookings(db, book):
+    book(MARCH, total_cost=120.125)
+    book(MARCH, total_cost=80.5)
+    book(APRIL, status="approved", total_cost=999.0)
+    assert _summary(db) == {"2030-03": (pytest.approx(200.625), 2)}
+    _assert_matches_aggregate(db)
+
+def test_status_change_into_and_out_of_completed(db, booking_repo, book):
+    booking = book(MARCH, status="approved", total_cost=75.333)
+    assert _summary(db) == {}
+
+    booking_repo.update_booking_status(booking.id, BookingStatus.COMPLETED)
+    assert _summary(db) == {"2030-03": (pytest.approx(75.333), 1)}
+
+    booking_repo.update_booking_status(booking.id, BookingStatus.REJECTED)
+    # The month row stays behind with nothing in it, readers skip it
+    assert _summary(db) == {}
+    assert db.execute_and_fetch_one("SELECT revenue FROM revenue_monthly WHERE month = '2030-03'") == 0
+    _assert_matches_aggregate(db)
+
+def test_cost_update_of_a_completed_booking(db, booking_repo, book):
+    booking = book(MARCH, total_cost=100.0)
+    book(MARCH, total_cost=50.0)
+    booking.total_cost = 130.255
+    booking_repo.update(booking)
+    assert _summary(db) == {"2030-03": (pytest.approx(180.255), 2)}
+    _assert_matches_aggregate(db)
+
+def test_delete_subtracts_the_booking(db, book):
+    first = book(MARCH, total_cost=40.1)
+    book(MARCH, total_cost=60.2)
+    book(APRIL, status="pending")
+    db.execute("DELETE FROM booking WHERE id = ?", (first.id,))
+    assert _summary(db) == {"2030-03": (pytest.approx(60.2), 1)}
+    _assert_matches_aggregate(db)
+
+def test_rebuild_matches_the_aggregate(db, booking_repo, book):
+    for day in range(1, 29):
+        book(date(2030, 1 + day % 5, day), status="completed" if day % 3 else "approved", total_cost=day * 10.007)
+    # Corrupt the summary, rebuilding must restore it from the bookings alone
+    db.execute("UPDATE revenue_monthly SET revenue = revenue * 2, bookings = bookings + 3")
+    db.execute("INSERT INTO revenue_monthly (month, revenue, bookings) VALUES ('1999-01', 1.0, 1)")
+
+    BookingAnalyticsService(booking_repo).rebuild_revenue_summary()
+    _assert_matches_aggregate(db)
+    assert booking_repo.get_monthly_revenue_summary() == booking_repo.get_monthly_revenue(BookingStatus.COMPLETED)
+
+def test_database_at_v3_gets_the_unrounded_summary(empty_db):
+    """A database migrated before v007 still holds the cents based table and triggers"""
+    for migration in (v001_initial_schema, v002_booking_indexes, v003_revenue_monthly):
+        migration.upgrade(empty_db)
+    empty_db.execute(f"PRAGMA user_version = {v003_revenue_monthly.VERSION}")
+    empty_db.execute_many(
+        "INSERT INTO booking (start_date, end_date, status, total_cost) VALUES (?, ?, ?, ?)",
+        [(MARCH, MARCH, "completed", 10.004)] * 3 + [(APRIL, APRIL, "completed", 20.5)]
+    )
+
+    runner = MigrationRunner(empty_db)
+    assert runner.run() == runner.latest_version
+    _assert_matches_aggregate(empty_db)
+
+    # The replaced triggers keep following writes
+    booking_repo = BookingsRepository(empty_db)
+    booking_repo.add(Booking(None, None, APRIL, APRIL, "completed", 0.125))
+    _assert_matches_aggregate(empty_db)
+    assert booking_repo.get_monthly_revenue_summary() == booking_repo.get_monthly_revenue(BookingStatus.COMPLETED)
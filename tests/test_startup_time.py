@@ -0,0 +1,43 @@
+"""Cold start budget: importing main must stay cheap and must not load the analytics stack"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "gc_rental_app"
+
+# Cumulative import time of main, in microseconds. Measured around 90 ms without pandas/NumPy,
+# loading them pushes it past 500 ms
+IMPORT_BUDGET_US = 300_000
+HEAVY_MODULES = ("pandas", "numpy")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def _import_main():
+    """Import main in a fresh interpreter, return {module: cumulative us} from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules
+
+def test_main_import_skips_analytics_stack():
+    modules = _import_main()
+    loaded = [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+    assert not loaded, f"main imports {loaded[:5]} at start up"
+
+def test_main_import_within_budget():
+    # Best of three so a busy machine does not fail the run
+    cumulative = min(_import_main()["main"] for _ in range(3))
+    assert cumulative <= IMPORT_BUDGET_US, (
+        f"importing main took {cumulative / 1000:.0f} ms, budget is {IMPORT_BUDGET_US / 1000:.0f} ms"
+    )
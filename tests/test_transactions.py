@@ -0,0 +1,151 @@
+"""SQLiteDBHandler.transaction: commit, rollback, savepoints and after_transaction callbacks"""
+
+import threading
+from datetime import date
+import pytest
+from configs.app_constants import BookingStatus
+from repositories.bookings_repository import BookingsRepository
+from repositories.entities.booking import Booking
+from services.booking_analytics_service import BookingAnalyticsService
+from services.bookings_service import BookingService
+
+class _Failure(Exception):
+    pass
+
+@pytest.fixture
+def notes(db):
+    db.execute("CREATE TABLE note (id INTEGER PRIMARY KEY, text TEXT)")
+    def texts():
+        return [row["text"] for row in db.execute_and_fetch_all("SELECT text FROM note ORDER BY id")]
+    return texts
+
+def _add(db, text):
+    db.execute("INSERT INTO note (text) VALUES (?)", (text,))
+
+def test_block_commits_once_at_the_end(db, notes):
+    commits = []
+    db._connect().set_trace_callback(lambda sql: commits.append(sql) if sql.upper() == "COMMIT" else None)
+    with db.transaction():
+        _add(db, "a")
+        _add(db, "b")
+    db._connect().set_trace_callback(None)
+    assert notes() == ["a", "b"]
+    assert len(commits) == 1
+
+def test_failure_rolls_the_whole_block_back(db, notes):
+    with pytest.raises(_Failure):
+        with db.transaction():
+            _add(db, "a")
+            raise _Failure()
+    assert notes() == []
+    # The handler is usable again afterwards
+    _add(db, "b")
+    assert notes() == ["b"]
+
+def test_nested_blocks_commit_with_the_outer_one(db, notes):
+    with db.transaction():
+        _add(db, "outer")
+        with db.transaction():
+            _add(db, "inner")
+    assert notes() == ["outer", "inner"]
+
+def test_inner_failure_only_undoes_its_savepoint(db, notes):
+    with db.transaction():
+        _add(db, "before")
+        with pytest.raises(_Failure):
+            with db.transaction():
+                _add(db, "inner")
+                raise _Failure()
+        _add(db, "after")
+    assert notes() == ["before", "after"]
+
+def test_outer_failure_undoes_committed_savepoints(db, notes):
+    with pytest.raises(_Failure):
+        with db.transaction():
+            with db.transaction():
+                _add(db, "inner")
+            raise _Failure()
+    assert notes() == []
+
+def test_after_transaction_runs_right_away_outside_a_transaction(db):
+    calls = []
+    db.after_transaction(lambda: calls.append("ran"))
+    assert calls == ["ran"]
+
+def test_after_transaction_waits_for_the_commit(db, notes):
+    calls = []
+    with db.transaction():
+        _add(db, "a")
+        db.after_transaction(lambda: calls.append(notes()))
+        with db.transaction():
+            db.after_transaction(lambda: calls.append("inner"))
+        assert calls == []
+    assert calls == [["a"], "inner"]
+
+def test_after_transaction_is_skipped_on_rollback(db):
+    calls = []
+    with pytest.raises(_Failure):
+        with db.transaction():
+            db.after_transaction(lambda: calls.append("rolled back"))
+            raise _Failure()
+    assert calls == []
+
+    # Nothing left over for the next transaction either
+    with db.transaction():
+        pass
+    assert calls == []
+
+def test_inner_rollback_drops_only_its_own_callbacks(db):
+    calls = []
+    with db.transaction():
+        db.after_transaction(lambda: calls.append("outer"))
+        with pytest.raises(_Failure):
+            with db.transaction():
+                db.after_transaction(lambda: calls.append("inner"))
+                raise _Failure()
+    assert calls == ["outer"]
+
+class _RacingBookingsRepository(BookingsRepository):
+    """Holds every booking lookup at a barrier, so two callers read before either one writes"""
+
+    def __init__(self, db, barrier):
+        super().__init__(db)
+        self.__barrier = barrier
+
+    def get_by_booking_id(self, booking_id):
+        booking = super().get_by_booking_id(booking_id)
+        try:
+            self.__barrier.wait(timeout=0.5)
+        except threading.BrokenBarrierError:
+            pass
+        return booking
+
+@pytest.mark.parametrize("first, second", [("approve", "reject"), ("approve", "approve")])
+def test_concurrent_decisions_on_one_booking(db, vehicle_repo, customer, admin, fleet_ids, first, second):
+    booking_repo = BookingsRepository(db)
+    booking = Booking(customer.user_id, fleet_ids[0], date(2030, 5, 1), date(2030, 5, 3), total_cost=150.0)
+    booking_repo.add(booking)
+
+    racing_repo = _RacingBookingsRepository(db, threading.Barrier(2))
+    service = BookingService(racing_repo, vehicle_repo, BookingAnalyticsService(racing_repo), db)
+    outcomes = []
+
+    def decide(action):
+        try:
+            getattr(service, f"{action}_booking")(admin, booking.id)
+            outcomes.append("done")
+        except ValueError:
+            outcomes.append("refused")
+        finally:
+            db.release()
+
+    threads = [threading.Thread(target=decide, args=(action,)) for action in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ["done", "refused"]
+    assert booking_repo.get_by_booking_id(booking.id).status in (
+        BookingStatus.APPROVED.value, BookingStatus.REJECTED.value
+    )
@@ -0,0 +1,142 @@
+"""VehicleRepository identity map: hits, eviction on writes, LRU bound and stale load protection"""
+
+import threading
+import pytest
+from repositories.entities.vehicle import Vehicle
+from repositories.vehicle_repository import VehicleRepository
+
+class _QueryLog:
+    """DatabaseHandler stand-in recording SELECTs, on_select runs once a SELECT has read its rows"""
+
+    def __init__(self, db):
+        self.__db = db
+        self.selects: list[str] = []
+        self.on_select = None
+
+    def __getattr__(self, name):
+        return getattr(self.__db, name)
+
+    def execute(self, sql, params=()):
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return self.__db.execute(sql, params)
+        self.selects.append(" ".join(sql.split()))
+        rows = self.__db.execute_and_fetch_all(sql, params)
+        self.__after_select()
+        return _Rows(rows)
+
+    def execute_and_fetch_all(self, sql, params=()):
+        self.selects.append(" ".join(sql.split()))
+        rows = self.__db.execute_and_fetch_all(sql, params)
+        self.__after_select()
+        return rows
+
+    def __after_select(self):
+        hook, self.on_select = self.on_select, None
+        if hook is not None:
+            hook()
+
+class _Rows:
+    """Cursor stand-in over rows that were already fetched"""
+
+    def __init__(self, rows):
+        self.__rows = rows
+
+    def fetchone(self):
+        return self.__rows[0] if self.__rows else None
+
+    def fetchall(self):
+        return self.__rows
+
+@pytest.fixture
+def query_log(db):
+    return _QueryLog(db)
+
+@pytest.fixture
+def vehicle_ids(vehicle_repo):
+    for i in range(6):
+        vehicle_repo.add(Vehicle(f"CACHE{i}", "Toyota", "Corolla", 2020, 1000, 50.0, 1, 14))
+    return [vehicle.vehicle_id for vehicle in vehicle_repo.get_all()]
+
+def test_repeated_lookups_hit_the_cache(query_log, vehicle_ids):
+    repo = VehicleRepository(query_log)
+    first = repo.get_by_id(vehicle_ids[0])
+    assert repo.get_by_id(vehicle_ids[0]) is first
+    assert repo.get_by_plate("CACHE0") is first
+    assert (repo.cache_hits, repo.cache_misses) == (2, 1)
+    assert len(query_log.selects) == 1
+
+def test_mileage_update_evicts(vehicle_repo, vehicle_ids):
+    vehicle_repo.get_by_id(vehicle_ids[0])
+    misses = vehicle_repo.cache_misses
+    vehicle_repo.update_vehicle_mileage(vehicle_ids[0], 4200)
+    assert vehicle_repo.get_by_id(vehicle_ids[0]).mileage == 4200
+    assert vehicle_repo.cache_misses == misses + 1
+
+def test_update_evicts_the_old_plate(vehicle_repo, vehicle_ids):
+    vehicle = vehicle_repo.get_by_plate("CACHE1")
+    vehicle_repo.update(Vehicle("RENAMED", "Toyota", "Yaris", 2021, 1500, 60.0, 1, 14, vehicle.vehicle_id))
+    assert vehicle_repo.get_by_plate("CACHE1") is None
+    assert vehicle_repo.get_by_plate("RENAMED").model == "Yaris"
+    assert vehicle_repo.get_by_id(vehicle.vehicle_id).model == "Yaris"
+
+def test_delete_evicts(vehicle_repo, vehicle_ids):
+    vehicle_repo.get_by_id(vehicle_ids[2])
+    vehicle_repo.remove(vehicle_ids[2])
+    assert vehicle_repo.get_by_id(vehicle_ids[2]) is None
+    assert vehicle_repo.get_by_plate("CACHE2") is None
+
+def test_least_recently_used_vehicle_is_evicted_at_cache_size(query_log, vehicle_ids):
+    repo = VehicleRepository(query_log, cache_size=3)
+    for vehicle_id in vehicle_ids[:3]:
+        repo.get_by_id(vehicle_id)
+    # Touch the first vehicle, the second one becomes the least recently used
+    repo.get_by_id(vehicle_ids[0])
+    repo.get_by_id(vehicle_ids[3])
+    loads = len(query_log.selects)
+
+    for vehicle_id in (vehicle_ids[0], vehicle_ids[2], vehicle_ids[3]):
+        repo.get_by_id(vehicle_id)
+    assert len(query_log.selects) == loads
+    repo.get_by_id(vehicle_ids[1])
+    assert len(query_log.selects) == loads + 1
+
+def test_zero_cache_size_disables_the_cache(query_log, vehicle_ids):
+    repo = VehicleRepository(query_log, cache_size=0)
+    repo.get_by_id(vehicle_ids[0])
+    repo.get_by_id(vehicle_ids[0])
+    assert len(query_log.selects) == 2
+
+def test_load_overlapping_a_write_is_not_cached(query_log, vehicle_ids):
+    repo = VehicleRepository(query_log)
+    vehicle_id = vehicle_ids[0]
+    # The row is read, then a write lands before the loaded vehicle is remembered
+    query_log.on_select = lambda: repo.update_vehicle_mileage(vehicle_id, 9000)
+    assert repo.get_by_id(vehicle_id).mileage == 1000
+    assert repo.get_by_id(vehicle_id).mileage == 9000
+
+def test_row_read_before_commit_is_dropped_after_it(db, vehicle_repo, vehicle_ids):
+    vehicle_id = vehicle_ids[0]
+    with db.transaction():
+        vehicle_repo.update_vehicle_mileage(vehicle_id, 7000)
+        # Another thread still reads, and caches, the committed row
+        reader = threading.Thread(target=vehicle_repo.get_by_id, args=(vehicle_id,))
+        reader.start()
+        reader.join()
+    assert vehicle_repo.get_by_id(vehicle_id).mileage == 7000
+
+def test_get_by_ids_only_loads_uncached_vehicles(query_log, vehicle_ids):
+    repo = VehicleRepository(query_log)
+    cached = {vehicle_id: repo.get_by_id(vehicle_id) for vehicle_id in vehicle_ids[:2]}
+    query_log.selects.clear()
+
+    wanted = vehicle_ids[:4] + [vehicle_ids[0], None, 999]
+    vehicles = repo.get_by_ids(wanted)
+    assert sorted(vehicles) == vehicle_ids[:4]
+    assert all(vehicles[vehicle_id] is vehicle for vehicle_id, vehicle in cached.items())
+    # One IN (...) query for the two missing vehicles plus the unknown id
+    assert len(query_log.selects) == 1 and query_log.selects[0].count("?") == 3
+
+    # The loaded vehicles are cached from now on
+    query_log.selects.clear()
+    assert sorted(repo.get_by_ids(vehicle_ids[:4])) == vehicle_ids[:4]
+    assert not query_log.selects